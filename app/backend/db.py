@@ -1,16 +1,65 @@
+from typing import Any
+
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
-from app.settings import DATABASE_URL
+from app.settings import (
+    DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_CONNECT_TIMEOUT,
+)
+from app.backend.instrumentation import instrument_engine
+from app.backend.pool import InstrumentedAsyncQueuePool
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """Движок с настройками пула из settings (одинаковыми для primary и реплик)."""
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            "timeout": DB_CONNECT_TIMEOUT,
+            # Кеш prepared statements самого asyncpg и диалекта SQLAlchemy.
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+    instrument_engine(engine)
+    return engine
 
 
-engine = create_async_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+replica_engines = [create_engine(url) for url in DATABASE_REPLICA_URLS]
+replica_session_makers = [
+    async_sessionmaker(replica_engine, expire_on_commit=False, class_=AsyncSession)
+    for replica_engine in replica_engines
+]
+
+
+def get_engine_pools() -> dict[str, Any]:
+    """Пулы соединений процесса по имени движка: `primary`, `replica_<n>`."""
+    pools: dict[str, Any] = {"primary": engine.pool}
+    pools.update({f"replica_{index}": e.pool for index, e in enumerate(replica_engines)})
+    return pools
+
 
 class Base(DeclarativeBase):
     pass
@@ -1,10 +1,81 @@
-from typing import AsyncGenerator
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.backend.db import async_session_maker
+from app.settings import DB_REPLICA_RETRY_INTERVAL
+from app.backend.db import async_session_maker, replica_session_makers
+
+
+class ReplicaRouter:
+    """
+    Round-robin по репликам. Реплика, к которой не удалось подключиться,
+    пропускается `retry_interval` секунд.
+    """
+
+    def __init__(
+        self,
+        session_makers: list[async_sessionmaker[AsyncSession]],
+        retry_interval: float,
+    ) -> None:
+        self.session_makers = session_makers
+        self.retry_interval = retry_interval
+        self._down_until = [0.0] * len(session_makers)
+        self._counter = itertools.count()
+
+    def candidates(self) -> list[int]:
+        """Индексы доступных реплик, начиная со следующей по кругу."""
+        if not self.session_makers:
+            return []
+        start = next(self._counter) % len(self.session_makers)
+        now = time.monotonic()
+        return [
+            index % len(self.session_makers)
+            for index in range(start, start + len(self.session_makers))
+            if self._down_until[index % len(self.session_makers)] <= now
+        ]
+
+    def mark_down(self, index: int) -> None:
+        self._down_until[index] = time.monotonic() + self.retry_interval
+
+
+replica_router = ReplicaRouter(replica_session_makers, DB_REPLICA_RETRY_INTERVAL)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
+
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    Сессия для чтения: реплика (если настроены), при недоступности всех реплик - primary.
+
+    Не использовать там, где нужно прочитать только что записанное (read-your-writes).
+    """
+    for index in replica_router.candidates():
+        session = replica_router.session_makers[index]()
+        try:
+            # Соединение берется сразу, чтобы недоступная реплика отсеялась до запроса роута.
+            await session.connection()
+        except (SQLAlchemyError, OSError) as e:
+            await session.close()
+            replica_router.mark_down(index)
+            logger.warning(f"Replica #{index} is unavailable, fallback: {e}")
+            continue
+        async with session:
+            yield session
+        return
+
+    async with async_session_maker() as session:
+        yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    async with read_session() as session:
+        yield session
@@ -0,0 +1,64 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.settings import SQL_REPEATED_STATEMENT_THRESHOLD, SQL_REPEATED_STATEMENT_RAISE
+
+
+class RepeatedQueryException(Exception):
+    """Один и тот же запрос выполнен в рамках HTTP запроса слишком много раз (N+1)."""
+
+
+class QueryStats:
+    """Статистика SQL запросов одного HTTP запроса."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def add(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        if self.statements[statement] == SQL_REPEATED_STATEMENT_THRESHOLD + 1:
+            message = (
+                f"Statement executed more than {SQL_REPEATED_STATEMENT_THRESHOLD} times "
+                f"in one request (N+1?): {statement}"
+            )
+            if SQL_REPEATED_STATEMENT_RAISE:
+                raise RepeatedQueryException(message)
+            logger.warning(message)
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 2)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms};desc="{self.count} queries"'
+
+
+# Устанавливается middleware на время обработки запроса, вне запросов - `None`.
+request_query_stats: ContextVar[QueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if request_query_stats.get() is not None:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_query_stats.get()
+    started = getattr(context, "query_started", None)
+    if stats is not None and started is not None:
+        stats.add(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подсчет запросов и времени в бд для `request_query_stats` текущего запроса."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
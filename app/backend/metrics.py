@@ -0,0 +1,85 @@
+"""
+Метрики в формате prometheus (`GET /metrics`).
+
+При нескольких воркерах (uvicorn --workers / gunicorn) нужно задать переменную
+окружения `PROMETHEUS_MULTIPROC_DIR` (пустая директория, очищается перед запуском),
+тогда каждый воркер пишет значения в свои файлы, а `/metrics` агрегирует их.
+"""
+
+from celery.signals import before_task_publish
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.settings import PROMETHEUS_MULTIPROC_DIR
+from app.backend.db import get_engine_pools
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being processed.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+RESPONSES = Counter(
+    "http_responses_total",
+    "HTTP responses by route template and status code.",
+    ["method", "route", "status"],
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Configured DB connection pool size.",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "DB connections currently checked out of the pool.",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "DB connections opened above the pool size.",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+CELERY_TASKS_PUBLISHED = Counter(
+    "celery_tasks_published_total",
+    "Celery tasks sent to the broker.",
+    ["task"],
+)
+
+
+def update_pool_metrics() -> None:
+    """Снимок состояния пулов соединений текущего процесса (после каждого запроса и при сборе)."""
+    for name, pool in get_engine_pools().items():
+        DB_POOL_SIZE.labels(engine=name).set(pool.size())
+        DB_POOL_CHECKED_OUT.labels(engine=name).set(pool.checkedout())
+        DB_POOL_OVERFLOW.labels(engine=name).set(max(pool.overflow(), 0))
+
+
+def render_metrics() -> bytes:
+    """Метрики всех воркеров (multiprocess режим) или только текущего процесса."""
+    update_pool_metrics()
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+@before_task_publish.connect
+def count_published_task(sender: str | None = None, **kwargs) -> None:
+    CELERY_TASKS_PUBLISHED.labels(task=sender or "unknown").inc()
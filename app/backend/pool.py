@@ -0,0 +1,74 @@
+import bisect
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """Гистограмма ожидания соединения из пула и счетчик таймаутов."""
+
+    buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self) -> None:
+        self.wait_counts = [0] * (len(self.buckets) + 1)
+        self.wait_sum = 0.0
+        self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.wait_sum += seconds
+
+    def wait_histogram(self) -> dict[str, int]:
+        """Кумулятивные счетчики по верхним границам бакетов (как в prometheus)."""
+        histogram, total = {}, 0
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.wait_counts):
+            total += count
+            histogram[bound] = total
+        return histogram
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    `AsyncAdaptedQueuePool`, замеряющий время получения соединения.
+
+    Время включает ожидание свободного соединения и, если пул не заполнен,
+    установку нового соединения.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.observe_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def get_pool_status(pool: InstrumentedAsyncQueuePool) -> dict[str, Any]:
+    """Текущее состояние пула соединений."""
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "timeouts": pool.stats.timeouts,
+        "wait_time": {
+            "count": sum(pool.stats.wait_counts),
+            "sum": pool.stats.wait_sum,
+            "buckets": pool.stats.wait_histogram(),
+        },
+    }
@@ -0,0 +1,87 @@
+import time
+from collections import OrderedDict
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.settings import RATE_LIMIT_BACKEND, RATE_LIMIT_MEMORY_KEYS
+from app.backend.redis import redis_client
+
+
+class MemoryRateLimitBackend:
+    """
+    Token bucket в памяти процесса: `capacity` запросов подряд,
+    затем пополнение со скоростью `capacity / period` в секунду.
+    Лимит действует на каждый воркер отдельно.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        # Ключ -> (токены, время последнего обновления).
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(self, key: str, capacity: int, period: float) -> float:
+        """Списание токена -> 0, если запрос разрешен, иначе через сколько секунд повторить."""
+        now = time.monotonic()
+        rate = capacity / period
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+# Тот же алгоритм атомарно на стороне redis, время - часы redis (одни для всех нод).
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """
+    Token bucket в redis (Lua скрипт, один round trip) - общий лимит для всего кластера.
+    Если redis недоступен, лимит считается локально в воркере.
+    """
+
+    def __init__(self, redis: Redis, fallback: MemoryRateLimitBackend) -> None:
+        self.fallback = fallback
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, capacity: int, period: float) -> float:
+        try:
+            return float(await self._script(keys=[key], args=[capacity, capacity / period]))
+        except RedisError as e:
+            logger.warning(f"Rate limit check failed, using local limits: {e}")
+            return await self.fallback.acquire(key, capacity, period)
+
+
+memory_rate_limiter = MemoryRateLimitBackend(RATE_LIMIT_MEMORY_KEYS)
+rate_limiter: MemoryRateLimitBackend | RedisRateLimitBackend = (
+    RedisRateLimitBackend(redis_client, memory_rate_limiter)
+    if RATE_LIMIT_BACKEND == "redis"
+    else memory_rate_limiter
+)
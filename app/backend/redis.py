@@ -0,0 +1,10 @@
+from redis.asyncio import Redis
+
+from app.settings import REDIS_URL, REDIS_SOCKET_TIMEOUT
+
+
+redis_client = Redis.from_url(
+    REDIS_URL,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+)
@@ -16,10 +16,12 @@
 from celery import Celery
 from celery.schedules import crontab
 
+from app.settings import REDIS_URL
+
 celery = Celery(
     __name__,
-    broker="redis://127.0.0.1:6379/0",
-    backend="redis://127.0.0.1:6379/0",
+    broker=REDIS_URL,
+    backend=REDIS_URL,
     broker_connection_retry_on_startup=True,
 )
 
@@ -1,11 +1,18 @@
 import logging
+import random
 import sys
 from pprint import pformat
+from typing import Callable
 
 from loguru import logger
 from loguru._defaults import LOGURU_FORMAT
 
-from app.settings import BASE_DIR, LOGURU_CONF
+from app.settings import (
+    BASE_DIR,
+    LOGURU_CONF,
+    LOG_JSON,
+    LOG_ACCESS_SAMPLE_RATES,
+)
 
 
 class InterceptHandler(logging.Handler):
@@ -45,6 +52,29 @@ def format_record(record: dict) -> str:
     return format_string
 
 
+def should_log_access(level: str = "INFO") -> bool:
+    """
+    Семплирование access логов по уровню (`LOG_ACCESS_SAMPLE_RATES`).
+
+    Решение принимается один раз до форматирования записи, поэтому отброшенные
+    записи ничего не стоят и одинаково пропадают из всех sink.
+    """
+    rate = LOG_ACCESS_SAMPLE_RATES.get(level, 1.0)
+    return rate >= 1.0 or random.random() < rate
+
+
+def level_range_filter(min_level: str, max_level: str | None = None) -> Callable[[dict], bool]:
+    """Фильтр sink по диапазону уровней [min_level, max_level)."""
+    min_no = logger.level(min_level).no
+    max_no = logger.level(max_level).no if max_level else None
+
+    def filter_record(record: dict) -> bool:
+        level_no = record["level"].no
+        return level_no >= min_no and (max_no is None or level_no < max_no)
+
+    return filter_record
+
+
 def init_logging():
     """
     Инициализация глобального логирования через loguru.
@@ -63,21 +93,32 @@ def init_logging():
     intercept_handler = InterceptHandler()
     logging.getLogger("uvicorn").handlers = [intercept_handler]
 
-    logger.configure(
-        handlers=[{"sink": sys.stdout, "level": logging.INFO, "format": format_record}]
-    )
-    logger.add(
-        BASE_DIR / "logs" / "info.log",
-        level="INFO",
-        **LOGURU_CONF,
-    )
-    logger.add(
-        BASE_DIR / "logs" / "warning.log",
-        level="WARNING",
-        **LOGURU_CONF,
-    )
-    logger.add(
-        BASE_DIR / "logs" / "error.log",
-        level="ERROR",
-        **LOGURU_CONF,
-    )
+    stdout_handler = {
+        "sink": sys.stdout,
+        "level": logging.INFO,
+        "enqueue": LOGURU_CONF["enqueue"],
+    }
+    if LOG_JSON:
+        stdout_handler["serialize"] = True
+    else:
+        stdout_handler["format"] = format_record
+    logger.configure(handlers=[stdout_handler])
+
+    # Каждая запись попадает ровно в один файл по своему уровню.
+    for file_name, min_level, max_level in (
+        ("info.log", "INFO", "WARNING"),
+        ("warning.log", "WARNING", "ERROR"),
+        ("error.log", "ERROR", None),
+    ):
+        logger.add(
+            BASE_DIR / "logs" / file_name,
+            level=min_level,
+            filter=level_range_filter(min_level, max_level),
+            serialize=LOG_JSON,
+            **LOGURU_CONF,
+        )
+
+
+async def shutdown_logging():
+    """Дописать записи, оставшиеся в очередях sink (`enqueue`), при остановке приложения."""
+    await logger.complete()
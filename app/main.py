@@ -1,6 +1,9 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
-from app.logger import init_logging
+from app.logger import init_logging, shutdown_logging
 from app.middlewares import setup_middlewares
 
 from app.routers import (
@@ -10,10 +13,17 @@ from app.routers import (
     user,
     rewiew,
     products,
+    metrics,
 )
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await shutdown_logging()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 setup_middlewares(app)
 init_logging()
@@ -24,6 +34,7 @@ app.include_router(user.router)
 app.include_router(products.router)
 app.include_router(category.router)
 app.include_router(rewiew.router)
+app.include_router(metrics.router)
 
 
 from app.tasks import call_background_task
@@ -1,3 +1,5 @@
+import time
+
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,9 +7,53 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from loguru import logger
 
+from app.backend.instrumentation import QueryStats, request_query_stats
+from app.backend.metrics import (
+    REQUEST_LATENCY,
+    REQUESTS_IN_PROGRESS,
+    RESPONSES,
+    update_pool_metrics,
+)
+from app.logger import should_log_access
 from app.settings import ALLOW_ORIGINS, ALLOWED_HOSTS
 
 
+class PrometheusMiddleware:
+    """
+    Метрики запросов (ASGI middleware). Метка `route` - шаблон роута
+    (`/products/{product_id}`), а не сырой url, чтобы не плодить серии.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method=method).inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(method=method, route=route).observe(
+                time.perf_counter() - started
+            )
+            RESPONSES.labels(method=method, route=route, status=str(status_code)).inc()
+            REQUESTS_IN_PROGRESS.labels(method=method).dec()
+            update_pool_metrics()
+
+
 def setup_middlewares(app: FastAPI):
     app.add_middleware(
         CORSMiddleware,
@@ -24,12 +70,33 @@ def setup_middlewares(app: FastAPI):
 
     @app.middleware("http")
     async def exception_handling_middleware(request: Request, call_next):
+        # Статистика SQL запросов заполняется событиями движка (`instrument_engine`).
+        query_stats = QueryStats()
+        token = request_query_stats.set(query_stats)
+        request_logger = logger.bind(method=request.method, path=request.url.path)
         try:
-            logger.info(f"{request.method} {request.url}")
-            return await call_next(request)
+            response = await call_next(request)
         except Exception as e:
-            logger.error(f"{e} http_path={request.url}")
+            request_logger.bind(
+                db_queries=query_stats.count,
+                db_time_ms=query_stats.duration_ms,
+            ).error("{} http_path={}", e, request.url)
             return JSONResponse(
                 content="Something went wrong",
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+        finally:
+            request_query_stats.reset(token)
+
+        response.headers["Server-Timing"] = query_stats.server_timing()
+        if should_log_access("INFO"):
+            request_logger.bind(
+                access=True,
+                status=response.status_code,
+                db_queries=query_stats.count,
+                db_time_ms=query_stats.duration_ms,
+            ).info("{} {} {}", request.method, request.url, response.status_code)
+        return response
+
+    # Последний добавленный middleware - внешний, поэтому видит и ответы с 500.
+    app.add_middleware(PrometheusMiddleware)
@@ -1,9 +1,19 @@
+from datetime import datetime
+
 from sqlalchemy import (
+    TIMESTAMP,
+    Column,
+    Computed,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Boolean,
+    func,
+    text,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship, Mapped, mapped_column, validates
 
 from app.backend.db import Base
@@ -13,6 +23,54 @@ from app.models.services.exceptions import ProductValidationException
 class Product(Base):
     """Модель продуктов."""
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset пагинация списка: WHERE is_active [AND category_id] AND id > :after ORDER BY id.
+        Index("ix_products_active_category_id", "is_active", "category_id", "id"),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # Фильтры и сортировки списка (только активные продукты):
+        Index(
+            "ix_products_active_price",
+            "price",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_products_active_category_price",
+            "category_id",
+            "price",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_products_active_rating",
+            "rating",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_products_active_author",
+            "author_id",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index(
+            "ix_products_active_in_stock",
+            "id",
+            postgresql_where=text("is_active AND stock > 0"),
+        ),
+        # Поиск свободного суффикса slug: slug LIKE 'base-%' (при любом collation бд).
+        Index(
+            "ix_products_slug_pattern",
+            "slug",
+            postgresql_ops={"slug": "varchar_pattern_ops"},
+        ),
+    )
+    __mapper_args__ = {
+        # Серверные значения (`updated_at`) возвращаются через RETURNING, без ленивой загрузки.
+        "eager_defaults": True,
+        # Колонка только для поиска в SQL, в объекты модели не загружается.
+        "exclude_properties": ["search_vector"],
+    }
     # Table fields:
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String(256))
@@ -21,8 +79,17 @@ class Product(Base):
     price: Mapped[int] = mapped_column(Integer)
     image_url: Mapped[str | None] = mapped_column(String(256), nullable=True)
     stock: Mapped[int] = mapped_column(Integer)
-    rating: Mapped[int] = mapped_column(Integer, default=0)
+    # Агрегаты активных отзывов, поддерживаются инкрементально при записи отзывов:
+    rating: Mapped[float] = mapped_column(Float, default=0, server_default="0")
+    review_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    grade_sum: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        index=True,
+    )
     category_id: Mapped[int] = mapped_column(Integer, ForeignKey("categories.id"), index=True)
     author_id: Mapped[int] = mapped_column(
         Integer,
@@ -30,6 +97,13 @@ class Product(Base):
         index=True,
         nullable=True
     )
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))",
+            persisted=True,
+        ),
+    )
     # Relationships:
     category = relationship("app.models.category.Category", back_populates="products")
     author = relationship("app.models.user.User", back_populates="products")
@@ -41,12 +115,22 @@ class Product(Base):
 
     @validates("price")
     def validate_price(self, key, value):
-        if value <= 0:
-            raise ProductValidationException("Price cannot be <= 0!")
-        return value
+        return check_product_price(value)
 
     @validates("stock")
     def validate_stock(self, key, value):
-        if value < 0:
-            raise ProductValidationException("Stock cannot be < 0!")
-        return value
+        return check_product_stock(value)
+
+
+def check_product_price(value: int) -> int:
+    """Проверка цены, общая для ORM валидатора и массового импорта."""
+    if value <= 0:
+        raise ProductValidationException("Price cannot be <= 0!")
+    return value
+
+
+def check_product_stock(value: int) -> int:
+    """Проверка остатка, общая для ORM валидатора и массового импорта."""
+    if value < 0:
+        raise ProductValidationException("Stock cannot be < 0!")
+    return value
@@ -3,6 +3,7 @@ from zoneinfo import ZoneInfo
 
 from sqlalchemy import (
     Boolean,
+    Index,
     TIMESTAMP,
     Integer,
     ForeignKey,
@@ -17,7 +18,17 @@ from app.models.services.exceptions import ReviewValidationException
 
 class Review(Base):
     __tablename__ = "reviews"
-    __table_args__ = (UniqueConstraint("author_id", "product_id", name="unique_review_user"),)
+    __table_args__ = (
+        UniqueConstraint("author_id", "product_id", name="unique_review_user"),
+        # Keyset пагинация отзывов продукта (новые первыми).
+        Index(
+            "ix_reviews_product_active_created",
+            "product_id",
+            "is_active",
+            "datetime_created",
+            "id",
+        ),
+    )
 
     # Table fields:
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from fastapi import HTTPException, status
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from app.settings import CATEGORY_CACHE_CHECK_INTERVAL
+from app.backend.db import async_session_maker
+from app.backend.redis import redis_client
+from app.models.category import Category
+
+
+class CategoryCache:
+    """
+    Версионируемый in-process кеш категорий.
+
+    Общая версия хранится в redis и увеличивается при каждом изменении категорий.
+    Воркер сверяет свою версию не чаще раза в `check_interval` секунд, поэтому
+    все воркеры видят изменения не позже чем через `check_interval`.
+    Если redis недоступен, кеш просто перечитывается с тем же интервалом.
+    Категории всегда читаются с primary, чтобы не закешировать отстающую реплику.
+    """
+
+    version_key = "cache:categories:version"
+
+    def __init__(self, check_interval: float) -> None:
+        self.check_interval = check_interval
+        self._categories: dict[int, Category] | None = None
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version or 0
+
+    def _is_fresh(self) -> bool:
+        if self._categories is None:
+            return False
+        return time.monotonic() - self._checked_at < self.check_interval
+
+    async def _get_remote_version(self) -> int | None:
+        try:
+            return int(await redis_client.get(self.version_key) or 0)
+        except RedisError as e:
+            logger.warning(f"Category cache version check failed: {e}")
+            return None
+
+    async def _load(self) -> dict[int, Category]:
+        if self._is_fresh():
+            return self._categories  # type: ignore
+        async with self._lock:
+            if self._is_fresh():
+                return self._categories  # type: ignore
+            version = await self._get_remote_version()
+            if self._categories is None or version is None or version != self._version:
+                async with async_session_maker() as session:
+                    categories = (
+                        await session.scalars(select(Category).order_by(Category.id))
+                    ).all()
+                self._categories = {category.id: category for category in categories}
+            self._version = version
+            self._checked_at = time.monotonic()
+            return self._categories
+
+    async def get_active(self) -> list[Category]:
+        categories = await self._load()
+        return [category for category in categories.values() if category.is_active]
+
+    async def get(self, category_id: int) -> Category | None:
+        categories = await self._load()
+        return categories.get(category_id)
+
+    async def get_or_404(self, category_id: int) -> Category:
+        category = await self.get(category_id)
+        if category is None:
+            raise HTTPException(detail="Not found", status_code=status.HTTP_404_NOT_FOUND)
+        return category
+
+    async def invalidate(self) -> None:
+        """Сброс кеша после изменения категорий (в этом воркере сразу, в остальных через redis)."""
+        self._categories = None
+        try:
+            await redis_client.incr(self.version_key)
+        except RedisError as e:
+            logger.warning(f"Category cache invalidation signal failed: {e}")
+
+
+category_cache = CategoryCache(CATEGORY_CACHE_CHECK_INTERVAL)
@@ -0,0 +1,177 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.settings import (
+    PRODUCT_CACHE_LOCAL_SIZE,
+    PRODUCT_CACHE_LOCAL_TTL,
+    PRODUCT_CACHE_LOCK_TTL,
+    PRODUCT_CACHE_TTL,
+)
+from app.backend.cache import TTLCache
+from app.backend.redis import redis_client
+from app.models.services.category_utils import category_cache
+
+
+def product_version_key(product_id: int) -> str:
+    return f"cache:product:{product_id}:version"
+
+
+class ProductDetailCache:
+    """
+    Двухуровневый кеш сериализованных (json байты) карточек продуктов.
+
+    1. In-process LRU на `local_ttl` сек. - без сетевых запросов для самых горячих ключей,
+       в других воркерах изменения видны не позже чем через `local_ttl`.
+    2. Общий redis на `ttl` сек. Значение хранится вместе с версией продукта, версия
+       увеличивается при каждой инвалидации (`INCR`), поэтому запись, посчитанная
+       до инвалидации и сохраненная после нее, не будет отдана. Версия и значение
+       читаются одним `MGET`.
+
+    Версия кеша категорий входит в ключ, поэтому изменение категорий сбрасывает все карточки.
+    Защита от stampede: в процессе один загрузчик на ключ, между процессами -
+    блокировка `SET NX` в redis, остальные ждут появления значения до `lock_ttl` сек.
+    Без redis кеш работает только как локальный.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(
+        self,
+        redis: Redis,
+        local_size: int,
+        local_ttl: float,
+        ttl: int,
+        lock_ttl: float,
+    ) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self._local: TTLCache[int, tuple[int, bytes]] = TTLCache(local_size, local_ttl)
+        self._loading: dict[int, asyncio.Future[bytes | None]] = {}
+
+    @staticmethod
+    def _payload_key(product_id: int, category_version: int) -> str:
+        return f"cache:product:{product_id}:categories:{category_version}"
+
+    @staticmethod
+    def _lock_key(product_id: int) -> str:
+        return f"cache:product:{product_id}:lock"
+
+    async def get_or_load(
+        self,
+        product_id: int,
+        loader: Callable[[], Awaitable[bytes | None]],
+    ) -> bytes | None:
+        """Карточка из кеша или от `loader` (`None` - продукта нет, не кешируется)."""
+        # Версия обновляется внутри вызова не чаще раза в CATEGORY_CACHE_CHECK_INTERVAL.
+        await category_cache.get_active()
+        category_version = category_cache.version
+
+        local = self._local.get(product_id)
+        if local is not None and local[0] == category_version:
+            return local[1]
+
+        loading = self._loading.get(product_id)
+        if loading is not None:
+            try:
+                return await asyncio.shield(loading)
+            except asyncio.CancelledError:
+                # Отменен запрос-загрузчик, а не этот -> грузим сами.
+                if not loading.cancelled():
+                    raise
+        future: asyncio.Future[bytes | None] = asyncio.get_running_loop().create_future()
+        self._loading[product_id] = future
+        try:
+            payload = await self._load(product_id, category_version, loader)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение получат ожидающие, в этом вызове оно пробрасывается ниже.
+            future.exception()
+            raise
+        else:
+            future.set_result(payload)
+        finally:
+            self._loading.pop(product_id, None)
+        if payload is not None:
+            self._local.set(product_id, (category_version, payload))
+        return payload
+
+    async def _load(
+        self,
+        product_id: int,
+        category_version: int,
+        loader: Callable[[], Awaitable[bytes | None]],
+    ) -> bytes | None:
+        key = self._payload_key(product_id, category_version)
+        try:
+            version, payload = await self._read(product_id, key)
+            if payload is not None:
+                return payload
+            is_locked = await self.redis.set(
+                self._lock_key(product_id), 1, nx=True, px=int(self.lock_ttl * 1000)
+            )
+            if not is_locked:
+                payload = await self._wait(product_id, key)
+                if payload is not None:
+                    return payload
+        except RedisError as e:
+            logger.warning(f"Product cache read failed: {e}")
+            return await loader()
+
+        try:
+            payload = await loader()
+            if payload is not None:
+                await self.redis.set(key, b"%d:%b" % (version, payload), ex=self.ttl)
+            return payload
+        except RedisError as e:
+            logger.warning(f"Product cache write failed: {e}")
+            return payload
+        finally:
+            if is_locked:
+                try:
+                    await self.redis.delete(self._lock_key(product_id))
+                except RedisError:
+                    pass
+
+    async def _read(self, product_id: int, key: str) -> tuple[int, bytes | None]:
+        """-> (текущая версия продукта, значение этой версии или `None`)."""
+        raw_version, raw = await self.redis.mget(product_version_key(product_id), key)
+        # Клиент без decode_responses -> bytes.
+        version = int(raw_version or 0)
+        if raw is None:
+            return version, None
+        stored_version, _, payload = raw.partition(b":")  # type: ignore[arg-type]
+        return version, payload if int(stored_version) == version else None  # type: ignore
+
+    async def _wait(self, product_id: int, key: str) -> bytes | None:
+        """Ожидание значения от загрузчика в другом процессе (не дольше `lock_ttl`)."""
+        for _ in range(int(self.lock_ttl / self.poll_interval)):
+            await asyncio.sleep(self.poll_interval)
+            _, payload = await self._read(product_id, key)
+            if payload is not None:
+                return payload
+        return None
+
+    async def invalidate(self, product_id: int) -> None:
+        """Вызывать после коммита изменений продукта (в других воркерах - через redis)."""
+        self._local.invalidate(product_id)
+        try:
+            await self.redis.incr(product_version_key(product_id))
+        except RedisError as e:
+            logger.warning(f"Product cache invalidation failed: {e}")
+
+
+product_cache = ProductDetailCache(
+    redis_client,
+    local_size=PRODUCT_CACHE_LOCAL_SIZE,
+    local_ttl=PRODUCT_CACHE_LOCAL_TTL,
+    ttl=PRODUCT_CACHE_TTL,
+    lock_ttl=PRODUCT_CACHE_LOCK_TTL,
+)
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+from sqlalchemy import select
+
+from app.settings import EXPORT_CHUNK_SIZE
+from app.backend.db_depends import read_session
+from app.models.category import Category
+from app.models.products import Product
+from app.models.user import User
+
+
+EXPORT_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.slug,
+    Product.description,
+    Product.price,
+    Product.image_url,
+    Product.stock,
+    Product.rating,
+    Product.review_count,
+    Product.updated_at,
+    Product.category_id,
+    Category.name.label("category_name"),
+    Category.slug.label("category_slug"),
+    Product.author_id,
+    User.email.label("author_email"),
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+
+def _format_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def iter_export_rows(
+    category_id: int | None = None,
+    updated_since: datetime | None = None,
+) -> AsyncIterator[list[tuple[Any, ...]]]:
+    """
+    Активные продукты пачками по `EXPORT_CHUNK_SIZE` строк через серверный курсор.
+
+    Сессия открывается внутри генератора: ответ стримится уже после выхода из
+    зависимостей роута, а следующая пачка читается только когда клиент забрал
+    предыдущую.
+    """
+    query = (
+        select(*EXPORT_COLUMNS)
+        .join(Category, Product.category_id == Category.id)
+        .outerjoin(User, Product.author_id == User.id)
+        .where(Product.is_active == True)
+        .order_by(Product.id)
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+    if updated_since is not None:
+        query = query.where(Product.updated_at >= updated_since)
+
+    async with read_session() as session:
+        result = await session.stream(query)
+        async for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+
+async def export_ndjson(rows: AsyncIterator[list[tuple[Any, ...]]]) -> AsyncIterator[bytes]:
+    async for partition in rows:
+        lines = (
+            json.dumps(dict(zip(EXPORT_FIELDS, map(_format_value, row))), ensure_ascii=False)
+            for row in partition
+        )
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def export_csv(rows: AsyncIterator[list[tuple[Any, ...]]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for partition in rows:
+        writer.writerows([map(_format_value, row) for row in partition])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
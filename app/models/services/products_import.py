@@ -0,0 +1,333 @@
+import csv
+import json
+from collections import deque
+from typing import Any, AsyncIterator
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.settings import BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_MAX_ERRORS
+from app.models.user import User
+from app.models.products import Product, check_product_price, check_product_stock
+from app.models.services.category_utils import category_cache
+from app.models.services.exceptions import ProductValidationException
+from app.models.services.products_utils import slug_base, slug_stem
+from app.schemas.product import ProductCreateSchema
+
+
+IMPORT_COLUMNS = (
+    "name",
+    "slug",
+    "description",
+    "price",
+    "image_url",
+    "stock",
+    "category_id",
+    "author_id",
+)
+# Ограничения длины строковых колонок products (и временной таблицы импорта).
+COLUMN_MAX_LENGTHS: dict[str, int] = {
+    column: Product.__table__.c[column].type.length  # type: ignore[attr-defined]
+    for column in ("name", "slug", "description", "image_url")
+}
+
+# Временная таблица живет в рамках соединения, строки очищаются на каждом коммите.
+CREATE_STAGING_TABLE = text(
+    f"""
+    CREATE TEMPORARY TABLE IF NOT EXISTS products_import (
+        name varchar({COLUMN_MAX_LENGTHS["name"]}),
+        slug varchar({COLUMN_MAX_LENGTHS["slug"]}),
+        description varchar({COLUMN_MAX_LENGTHS["description"]}),
+        price integer,
+        image_url varchar({COLUMN_MAX_LENGTHS["image_url"]}),
+        stock integer,
+        category_id integer,
+        author_id integer
+    ) ON COMMIT DELETE ROWS
+    """
+)
+INSERT_FROM_STAGING = text(
+    f"""
+    INSERT INTO products ({", ".join(IMPORT_COLUMNS)}, rating, is_active)
+    SELECT {", ".join(IMPORT_COLUMNS)}, 0, true FROM products_import
+    ON CONFLICT (slug) DO NOTHING
+    RETURNING slug
+    """
+)
+# Занятость slug пачки и максимальные номера `<stem>-<n>` одним запросом, как в `allocate_slug`.
+# Диапазон по префиксу (`~>=~`/`~<~`) использует индекс `ix_products_slug_pattern`
+# и для непостоянного в запросе шаблона, в отличие от LIKE.
+SELECT_TAKEN_SLUGS = text(
+    """
+    SELECT
+        b.base,
+        b.stem,
+        EXISTS (SELECT 1 FROM products p WHERE p.slug = b.base) AS is_taken,
+        (
+            SELECT max(CAST(substring(p.slug FROM '[0-9]+$') AS integer))
+            FROM products p
+            WHERE p.slug ~>=~ (b.stem || '-')
+                AND p.slug ~<~ (b.stem || '.')
+                AND p.slug ~ ('^' || b.stem || '-[0-9]{1,9}$')
+        ) AS max_number
+    FROM unnest(CAST(:bases AS varchar[]), CAST(:stems AS varchar[])) AS b(base, stem)
+    """
+)
+
+
+class ProductImportResult:
+    """Итог импорта: кол-во созданных продуктов и ошибки по номерам строк."""
+
+    def __init__(self) -> None:
+        self.created = 0
+        self.failed = 0
+        self.errors: list[dict[str, Any]] = []
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < BULK_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+
+async def iter_raw_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Построчное чтение потока тела запроса, строки с окончаниями (кроме последней)."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw_line in lines:
+            yield raw_line.decode("utf-8", errors="replace") + "\n"
+    if buffer:
+        yield buffer.decode("utf-8", errors="replace")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Построчное чтение потока тела запроса -> (номер строки, строка), без пустых строк."""
+    line_number = 0
+    async for line in iter_raw_lines(chunks):
+        line_number += 1
+        if line.strip():
+            yield line_number, line.rstrip("\r\n")
+
+
+class LineFeed:
+    """Итератор строк для `csv.reader`, пополняемый по мере чтения потока."""
+
+    def __init__(self) -> None:
+        self._lines: deque[str] = deque()
+
+    def append(self, line: str) -> None:
+        self._lines.append(line)
+
+    def __bool__(self) -> bool:
+        return bool(self._lines)
+
+    def __iter__(self) -> "LineFeed":
+        return self
+
+    def __next__(self) -> str:
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+
+async def iter_csv_rows(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, list[str] | str]]:
+    """
+    Разбор CSV одним `csv.reader`: поля в кавычках могут содержать переводы строк.
+
+    Строки передаются читателю только целыми записями (четное число кавычек),
+    поэтому `reader` не упирается в конец еще не прочитанного потока.
+    Отдает (номер последней строки записи, значения) либо (номер строки, текст ошибки).
+    """
+    feed = LineFeed()
+    reader = csv.reader(feed)
+    line_offset = 0
+    quotes = 0
+    async for line in iter_raw_lines(chunks):
+        feed.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            # Поле в кавычках продолжается на следующей строке.
+            continue
+        quotes = 0
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            # Состояние читателя после ошибки не определено -> новый читатель.
+            line_offset += reader.line_num
+            yield line_offset, f"Invalid CSV: {e}"
+            reader = csv.reader(feed)
+            continue
+        if values:
+            yield line_offset + reader.line_num, values
+    if feed:
+        yield line_offset + reader.line_num + 1, "Unterminated quoted field"
+
+
+async def iter_import_records(
+    chunks: AsyncIterator[bytes],
+    is_csv: bool,
+) -> AsyncIterator[tuple[int, dict[str, Any] | str]]:
+    """
+    Разбор NDJSON (объект на строку) или CSV (строка заголовка + запись на строку,
+    поля в кавычках могут быть многострочными).
+
+    Отдает (номер строки, запись) либо (номер строки, текст ошибки разбора).
+    """
+    if is_csv:
+        header: list[str] | None = None
+        async for line_number, values in iter_csv_rows(chunks):
+            if isinstance(values, str):
+                yield line_number, values
+                continue
+            if header is None:
+                header = [column.strip() for column in values]
+                continue
+            if len(values) != len(header):
+                yield line_number, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield line_number, {
+                column: value if value != "" else None for column, value in zip(header, values)
+            }
+        return
+
+    async for line_number, line in iter_lines(chunks):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, "Expected JSON object"
+            continue
+        yield line_number, record
+
+
+async def validate_import_record(user: User, record: dict[str, Any]) -> tuple[Any, ...]:
+    """Валидация строки импорта схемой и правилами модели -> кортеж значений `IMPORT_COLUMNS`."""
+    product_data = ProductCreateSchema.model_validate(record)
+    check_product_price(product_data.price)
+    check_product_stock(product_data.stock)
+    # Слишком длинное значение уронило бы COPY всей пачки, поэтому проверяется заранее.
+    for column in ("name", "description", "image_url"):
+        value = getattr(product_data, column)
+        max_length = COLUMN_MAX_LENGTHS[column]
+        if value is not None and len(value) > max_length:
+            raise ProductValidationException(f"{column} is longer than {max_length} characters")
+    if await category_cache.get(product_data.category_id) is None:
+        raise ProductValidationException(f"Category {product_data.category_id} not found")
+    return (
+        product_data.name,
+        slug_base(product_data.name),
+        product_data.description,
+        product_data.price,
+        product_data.image_url,
+        product_data.stock,
+        product_data.category_id,
+        user.id,
+    )
+
+
+async def allocate_batch_slugs(
+    db: AsyncSession,
+    batch: list[tuple[int, tuple[Any, ...]]],
+) -> list[tuple[int, tuple[Any, ...]]]:
+    """
+    Свободные slug для пачки по тем же правилам, что и `allocate_slug` у `POST /products/`:
+    занятый в бд или в пачке slug получает следующий номер `<stem>-<n>`.
+    """
+    bases = list(dict.fromkeys(row[1] for _, row in batch))
+    stems = [slug_stem(base) for base in bases]
+    taken: set[str] = set()
+    next_numbers: dict[str, int] = {}
+    for base, stem, is_taken, max_number in await db.execute(
+        SELECT_TAKEN_SLUGS, {"bases": bases, "stems": stems}
+    ):
+        if is_taken:
+            taken.add(base)
+        next_numbers[stem] = max(next_numbers.get(stem, 2), (max_number or 1) + 1)
+
+    allocated = []
+    used: set[str] = set()
+    for line_number, row in batch:
+        slug = row[1]
+        if slug in taken or slug in used:
+            stem = slug_stem(slug)
+            number = next_numbers[stem]
+            while f"{stem}-{number}" in used:
+                number += 1
+            next_numbers[stem] = number + 1
+            slug = f"{stem}-{number}"
+        used.add(slug)
+        allocated.append((line_number, (row[0], slug, *row[2:])))
+    return allocated
+
+
+async def write_import_batch(
+    db: AsyncSession,
+    batch: list[tuple[int, tuple[Any, ...]]],
+    result: ProductImportResult,
+) -> None:
+    """
+    Запись пачки: подбор slug, COPY во временную таблицу, затем один INSERT ... SELECT.
+
+    Slug, занятый параллельным запросом после подбора, пропускается
+    (ON CONFLICT DO NOTHING) и попадает в ошибки.
+    """
+    batch = await allocate_batch_slugs(db, batch)
+    await db.execute(CREATE_STAGING_TABLE)
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+        "products_import",
+        records=[row for _, row in batch],
+        columns=IMPORT_COLUMNS,
+    )
+    inserted_slugs = set((await db.scalars(INSERT_FROM_STAGING)).all())
+    await db.commit()
+
+    result.created += len(inserted_slugs)
+    for line_number, row in batch:
+        if row[1] not in inserted_slugs:
+            result.add_error(line_number, "Slug already exists")
+
+
+async def import_products(
+    db: AsyncSession,
+    user: User,
+    chunks: AsyncIterator[bytes],
+    is_csv: bool,
+) -> ProductImportResult:
+    """Потоковый импорт продуктов пачками по `BULK_IMPORT_BATCH_SIZE` строк."""
+    result = ProductImportResult()
+    batch: list[tuple[int, tuple[Any, ...]]] = []
+
+    async for line_number, record in iter_import_records(chunks, is_csv):
+        if isinstance(record, str):
+            result.add_error(line_number, record)
+            continue
+        try:
+            row = await validate_import_record(user, record)
+        except ValidationError as e:
+            result.add_error(
+                line_number,
+                "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()),
+            )
+            continue
+        except ProductValidationException as e:
+            result.add_error(line_number, str(e))
+            continue
+        batch.append((line_number, row))
+        if len(batch) >= BULK_IMPORT_BATCH_SIZE:
+            await write_import_batch(db, batch, result)
+            batch = []
+
+    if batch:
+        await write_import_batch(db, batch, result)
+    return result
@@ -1,55 +1,172 @@
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Float, Integer, case, cast, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from slugify import slugify
 
-from app.models.category import Category
+from app.settings import RATING_UPDATE_MODE
 from app.models.user import User
 from app.models.products import Product
 from app.models.review import Review
 from app.schemas.product import ProductCreateSchema
-from app.routers.services.utils import get_object_or_404
+from app.models.services.category_utils import category_cache
 
 
-async def update_product_rating(db: AsyncSession, product_id: int):
-    avg_rating = await db.scalar(
-        select(func.avg(Review.grade))
+SLUG_MAX_LENGTH: int = Product.__table__.c.slug.type.length  # type: ignore[attr-defined]
+# Место под суффикс "-<n>" у длинных slug.
+SLUG_SUFFIX_LENGTH = 7
+# Попыток сохранить продукт, если свободный slug занял параллельный запрос.
+SLUG_ALLOCATION_ATTEMPTS = 3
+
+
+async def apply_review_grade(
+    db: AsyncSession,
+    product_id: int,
+    grade: int,
+    count_delta: int,
+) -> int | None:
+    """
+    Инкрементальное обновление рейтинга продукта при добавлении (`count_delta=1`)
+    или исключении (`count_delta=-1`) активного отзыва с оценкой `grade`.
+
+    Один UPDATE без пересчета по всем отзывам, коммит остается за вызывающим кодом,
+    чтобы агрегаты менялись в одной транзакции с самим отзывом.
+    Возвращает `id` продукта или `None`, если продукта нет.
+    """
+    review_count = Product.review_count + count_delta
+    grade_sum = Product.grade_sum + grade * count_delta
+    return await db.scalar(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            review_count=review_count,
+            grade_sum=grade_sum,
+            rating=case(
+                (review_count > 0, cast(grade_sum, Float) / review_count),
+                else_=0,
+            ),
+        )
+        .returning(Product.id)
+    )
+
+
+async def register_review_grade(
+    db: AsyncSession,
+    product_id: int,
+    grade: int,
+    count_delta: int,
+) -> int | None:
+    """
+    Учет изменения активных отзывов продукта (до коммита) в зависимости от `RATING_UPDATE_MODE`.
+
+    В режиме `deferred` строка продукта не блокируется, только проверяется его
+    существование, пересчет планирует `reviews_changed` после коммита.
+    Возвращает `id` продукта или `None`, если продукта нет.
+    """
+    if RATING_UPDATE_MODE == "deferred":
+        return await db.scalar(select(Product.id).where(Product.id == product_id))
+    return await apply_review_grade(db, product_id, grade, count_delta)
+
+
+async def recompute_product_rating(db: AsyncSession, product_id: int) -> int | None:
+    """
+    Полный пересчет агрегатов рейтинга продукта по активным отзывам одним UPDATE ... FROM.
+    Коммит за вызывающим кодом. Возвращает `id` продукта или `None`, если продукта нет.
+    """
+    stats = (
+        select(
+            func.count().label("review_count"),
+            func.coalesce(func.sum(Review.grade), 0).label("grade_sum"),
+        )
         .where(Review.product_id == product_id)
         .where(Review.is_active == True)
+        .subquery()
     )
-    if avg_rating is not None:
-        product = await db.get(Product, product_id)
-        if product:
-            product.rating = int(avg_rating)
-            await db.commit()
+    return await db.scalar(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            review_count=stats.c.review_count,
+            grade_sum=stats.c.grade_sum,
+            rating=case(
+                (stats.c.review_count > 0, cast(stats.c.grade_sum, Float) / stats.c.review_count),
+                else_=0,
+            ),
+        )
+        .returning(Product.id)
+    )
+
+
+def slug_base(name: str) -> str:
+    """Slug по названию без суффикса (названия без букв и цифр -> "product")."""
+    return slugify(name, max_length=SLUG_MAX_LENGTH) or "product"
+
+
+def slug_stem(base: str) -> str:
+    """Основа для нумерованных slug `<stem>-<n>`: `base` с местом под суффикс."""
+    return base[:SLUG_MAX_LENGTH - SLUG_SUFFIX_LENGTH].rstrip("-")
+
+
+async def allocate_slug(db: AsyncSession, name: str, product_id: int | None = None) -> str:
+    """
+    Свободный slug для названия: `base`, а если занят - `base-<n>` со следующим
+    после максимального занятого номером. Один запрос по индексу `ix_products_slug_pattern`
+    (LIKE по префиксу), занятость `base` и максимальный номер считаются в бд.
+    `product_id` - продукт, чей slug не считается занятым (при обновлении).
+    """
+    base = slug_base(name)
+    stem = slug_stem(base)
+    # slugify оставляет только [a-z0-9-]: экранировать для LIKE и regex нечего.
+    # Номер ограничен 9 цифрами, чтобы приведение к integer не переполнялось.
+    is_numbered = Product.slug.regexp_match(f"^{stem}-[0-9]{{1,9}}$")
+    query = select(
+        func.bool_or(Product.slug == base),
+        func.max(cast(func.substring(Product.slug, "[0-9]+$"), Integer)).filter(is_numbered),
+    ).where(or_(Product.slug == base, Product.slug.like(f"{stem}-%")))
+    if product_id is not None:
+        query = query.where(Product.id != product_id)
+    is_taken, max_number = (await db.execute(query)).one()
+    if not is_taken:
+        return base
+    return f"{stem}-{(max_number or 1) + 1}"
+
+
+def is_slug_conflict(error: IntegrityError) -> bool:
+    return "slug" in str(error.orig)
 
 
 async def create_product_helper(db: AsyncSession, user: User, product_data: ProductCreateSchema):
-    """Вспомогательная функция для создания продукта в бд."""
-    category = await get_object_or_404(db, Category, Category.id == product_data.category_id)
-    product = Product(
-        name=product_data.name,
-        slug=slugify(product_data.name),
-        description=product_data.description,
-        price=product_data.price,
-        image_url=product_data.image_url,
-        stock=product_data.stock,
-        category_id=category.id,
-        author_id=user.id,
-    )
-    db.add(product)
-    await db.commit()
-    await db.refresh(product)
-    new_product = await db.scalar(
-        select(Product)
-        .where(Product.id == product.id)
-        .options(
-            selectinload(Product.author),
-            selectinload(Product.category),
+    """
+    Вспомогательная функция для создания продукта в бд.
+
+    `id` приходит из INSERT ... RETURNING при коммите, связанные поля
+    проставляются из уже загруженных объектов без повторного SELECT.
+    Slug с совпадающим названием получает числовой суффикс (`allocate_slug`).
+    """
+    category = await category_cache.get_or_404(product_data.category_id)
+    for attempt in range(1, SLUG_ALLOCATION_ATTEMPTS + 1):
+        product = Product(
+            name=product_data.name,
+            slug=await allocate_slug(db, product_data.name),
+            description=product_data.description,
+            price=product_data.price,
+            image_url=product_data.image_url,
+            stock=product_data.stock,
+            category_id=category.id,
+            author_id=user.id,
         )
-    )
-    return new_product
+        db.add(product)
+        try:
+            await db.commit()
+            break
+        except IntegrityError as e:
+            await db.rollback()
+            if attempt == SLUG_ALLOCATION_ATTEMPTS or not is_slug_conflict(e):
+                raise
+    set_committed_value(product, "category", category)
+    set_committed_value(product, "author", user)
+    return product
 
 
 async def update_product_helper(
@@ -58,25 +175,31 @@ async def update_product_helper(
     product: Product,
     product_data: ProductCreateSchema,
 ):
-    """Вспомогательная функция для обновления продукта в бд."""
-    category = await get_object_or_404(
-        db, Category, Category.id == product_data.category_id
-    )
-    product.name = product_data.name
-    product.slug = slugify(product_data.name)
-    product.description = product_data.description
-    product.price = product_data.price
-    product.image_url = product_data.name
-    product.category_id = category.id
-    await db.commit()
-    await db.refresh(product)
-
-    product_with_related_fields = await db.scalar(
-        select(Product)
-        .where(Product.id == product.id)
-        .options(
-            selectinload(Product.author),
-            selectinload(Product.category),
-        )
-    )
-    return product_with_related_fields
+    """
+    Вспомогательная функция для обновления продукта в бд.
+
+    Обновлять продукт может только автор, поэтому `author` == `user`.
+    """
+    category = await category_cache.get_or_404(product_data.category_id)
+    product_id = product.id
+    # Slug меняется только вместе с названием.
+    slug = product.slug if product.name == product_data.name else None
+    for attempt in range(1, SLUG_ALLOCATION_ATTEMPTS + 1):
+        product.name = product_data.name
+        product.slug = slug or await allocate_slug(db, product_data.name, product_id)
+        product.description = product_data.description
+        product.price = product_data.price
+        product.image_url = product_data.image_url
+        product.category_id = category.id
+        try:
+            await db.commit()
+            break
+        except IntegrityError as e:
+            await db.rollback()
+            if attempt == SLUG_ALLOCATION_ATTEMPTS or not is_slug_conflict(e):
+                raise
+            # rollback сбрасывает состояние продукта: перечитываем и применяем изменения заново.
+            await db.refresh(product)
+    set_committed_value(product, "category", category)
+    set_committed_value(product, "author", user)
+    return product
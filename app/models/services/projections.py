@@ -0,0 +1,109 @@
+from typing import Any, Sequence
+
+from sqlalchemy import Row, Select, select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.models.category import Category
+from app.models.products import Product
+from app.models.review import Review
+from app.models.user import User
+
+
+class RowProjection:
+    """
+    Колоночная проекция для списков: один SELECT ровно тех колонок, что нужны схеме
+    ответа (связанные таблицы - через join), строки -> `dict` без создания ORM объектов
+    и без identity map.
+
+    Колонки основной модели попадают в строку под своими именами (по ним работает
+    keyset пагинация), колонки связанных - с префиксом `<связь>__`.
+    Первая колонка связанной модели - ее первичный ключ: `None` после outer join
+    означает отсутствие связанного объекта.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[InstrumentedAttribute],
+        **related: Sequence[InstrumentedAttribute],
+    ) -> None:
+        self.fields = [column.key for column in columns]
+        self.related = {name: [column.key for column in cols] for name, cols in related.items()}
+        self.columns = [
+            *columns,
+            *(
+                column.label(f"{name}__{column.key}")
+                for name, cols in related.items()
+                for column in cols
+            ),
+        ]
+
+    def select(self) -> Select:
+        return select(*self.columns)
+
+    def to_dict(self, row: Row) -> dict[str, Any]:
+        data = dict(zip(self.fields, row))
+        offset = len(self.fields)
+        for name, keys in self.related.items():
+            values = row[offset:offset + len(keys)]
+            offset += len(keys)
+            data[name] = None if values[0] is None else dict(zip(keys, values))
+        return data
+
+    def to_dicts(self, rows: Sequence[Row]) -> list[dict[str, Any]]:
+        return [self.to_dict(row) for row in rows]
+
+
+USER_COLUMNS = (
+    User.id,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.is_admin,
+    User.is_supplier,
+    User.is_customer,
+)
+
+# `UserRetriveScehema` без хеша пароля и прочих колонок.
+USER_PROJECTION = RowProjection(USER_COLUMNS)
+
+# `ProductRetriveSchema`: продукт + категория + автор (может отсутствовать).
+PRODUCT_PROJECTION = RowProjection(
+    (
+        Product.id,
+        Product.name,
+        Product.slug,
+        Product.description,
+        Product.price,
+        Product.image_url,
+        Product.stock,
+        Product.rating,
+        Product.review_count,
+    ),
+    category=(Category.id, Category.is_active, Category.name, Category.slug),
+    author=USER_COLUMNS,
+)
+
+# `ReviewRetriveSchema`: отзыв + автор.
+REVIEW_PROJECTION = RowProjection(
+    (
+        Review.id,
+        Review.product_id,
+        Review.grade,
+        Review.comment,
+        Review.datetime_created,
+        Review.is_active,
+    ),
+    author=USER_COLUMNS,
+)
+
+
+def select_products() -> Select:
+    return (
+        PRODUCT_PROJECTION.select()
+        .join(Product.category)
+        .outerjoin(Product.author)
+    )
+
+
+def select_reviews() -> Select:
+    return REVIEW_PROJECTION.select().join(Review.author)
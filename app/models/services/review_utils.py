@@ -1,13 +1,28 @@
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+import asyncio
+import json
+
+from fastapi import HTTPException, status
+from kombu.exceptions import OperationalError
+from loguru import logger
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.settings import (
+    RATING_RECOMPUTE_DELAY,
+    RATING_UPDATE_MODE,
+    REVIEW_SUMMARY_CACHE_TTL,
+)
+from app.backend.db import async_session_maker
+from app.backend.redis import redis_client
 from app.models.user import User
 from app.models.products import Product
 from app.models.review import Review
-from app.routers.services.utils import get_object_or_404
-from app.models.services.products_utils import update_product_rating
+from app.models.services.product_cache import product_cache
+from app.models.services.products_utils import register_review_grade
 from app.schemas.review import ReviewCreateSchema
+from app.tasks import rating_pending_key, recompute_product_rating_task
 
 
 async def create_review_helper(
@@ -16,23 +31,143 @@ async def create_review_helper(
     user: User,
     review_data: ReviewCreateSchema,
 ):
-    """Вспомогательная функция для создания отзыва в бд."""
-    product = await get_object_or_404(db, Product, Product.id == product_id)
+    """
+    Вспомогательная функция для создания отзыва в бд.
+
+    Проверка существования продукта совмещена с обновлением его рейтинга
+    (UPDATE ... RETURNING), отзыв и агрегаты фиксируются одним коммитом
+    (в режиме `RATING_UPDATE_MODE=deferred` рейтинг пересчитывается позже).
+    """
     review = Review(
         author_id=user.id,
-        product_id=product.id,
+        product_id=product_id,
         grade=review_data.grade,
         comment=review_data.comment,
     )
+    if await register_review_grade(db, product_id, review.grade, 1) is None:
+        raise HTTPException(detail="Not found", status_code=status.HTTP_404_NOT_FOUND)
     db.add(review)
     await db.commit()
-    await db.refresh(review)
-    await update_product_rating(db, product_id)
-    new_review = await db.scalar(
-        select(Review)
-        .where(Review.id == review.id)
-        .options(
-            selectinload(Review.author),
-        )
+    await reviews_changed(product_id)
+    set_committed_value(review, "author", user)
+    return review
+
+
+def review_summary_key(product_id: int) -> str:
+    return f"cache:reviews:summary:{product_id}:payload"
+
+
+def review_summary_version_key(product_id: int) -> str:
+    return f"cache:reviews:summary:{product_id}:version"
+
+
+async def compute_review_summary(db: AsyncSession, product_id: int) -> dict | None:
+    """Гистограмма оценок активных отзывов одним GROUP BY, `None` - если продукта нет."""
+    if await db.scalar(select(Product.id).where(Product.id == product_id)) is None:
+        return None
+    rows = await db.execute(
+        select(Review.grade, func.count())
+        .where(Review.product_id == product_id)
+        .where(Review.is_active == True)
+        .group_by(Review.grade)
     )
-    return new_review
+    grades = dict.fromkeys(range(11), 0)
+    grades.update({grade: count for grade, count in rows.all()})
+    review_count = sum(grades.values())
+    grade_sum = sum(grade * count for grade, count in grades.items())
+    return {
+        "product_id": product_id,
+        "review_count": review_count,
+        "rating": grade_sum / review_count if review_count else 0,
+        "grades": grades,
+    }
+
+
+async def get_review_summary(product_id: int) -> dict:
+    """
+    Сводка по оценкам продукта из redis, при промахе - расчет и запись в redis.
+
+    Значение хранится вместе с версией отзывов продукта, версия увеличивается при каждом
+    изменении отзывов (`invalidate_review_summary`), поэтому сводка, посчитанная
+    до изменения и записанная после него, не будет отдана (как в `ProductDetailCache`).
+    Считается на primary, чтобы не закешировать отстающую реплику под новой версией.
+    TTL - страховка от пропущенной инвалидации. Без redis считается на каждый запрос.
+    """
+    key = review_summary_key(product_id)
+    version = None
+    try:
+        raw_version, cached = await redis_client.mget(
+            review_summary_version_key(product_id), key
+        )
+        version = int(raw_version or 0)
+    except RedisError as e:
+        logger.warning(f"Review summary cache read failed: {e}")
+        cached = None
+    if cached is not None:
+        # Клиент без decode_responses -> bytes.
+        stored_version, _, payload = cached.partition(b":")  # type: ignore[arg-type]
+        if int(stored_version) == version:
+            return json.loads(payload)
+
+    async with async_session_maker() as db:
+        summary = await compute_review_summary(db, product_id)
+    if summary is None:
+        raise HTTPException(detail="Not found", status_code=status.HTTP_404_NOT_FOUND)
+    if version is not None:
+        try:
+            await redis_client.set(
+                key, b"%d:%b" % (version, json.dumps(summary).encode()), ex=REVIEW_SUMMARY_CACHE_TTL
+            )
+        except RedisError as e:
+            logger.warning(f"Review summary cache write failed: {e}")
+    return summary
+
+
+async def invalidate_review_summary(product_id: int) -> None:
+    """Вызывать после коммита изменений отзывов продукта."""
+    try:
+        await redis_client.incr(review_summary_version_key(product_id))
+    except RedisError as e:
+        logger.warning(f"Review summary cache invalidation failed: {e}")
+
+
+async def schedule_rating_recompute(product_id: int) -> None:
+    """
+    Постановка пересчета рейтинга продукта в celery через `RATING_RECOMPUTE_DELAY` сек.
+    Пока задача ждет выполнения, повторные вызовы для того же продукта ничего не делают
+    (отметка `SET NX` в redis). Без redis задача ставится на каждый вызов.
+    Недоступность брокера не роняет уже закоммиченный запрос: ошибка логируется,
+    отметка снимается, чтобы следующее изменение отзывов снова поставило пересчет.
+    """
+    key = rating_pending_key(product_id)
+    try:
+        # TTL отметки - страховка на случай потери задачи.
+        is_first = await redis_client.set(key, 1, nx=True, ex=int(RATING_RECOMPUTE_DELAY) + 60)
+    except RedisError as e:
+        logger.warning(f"Rating recompute coalescing failed: {e}")
+        is_first = True
+    if not is_first:
+        return
+    try:
+        # Публикация в брокер синхронная, поэтому вне event loop.
+        await asyncio.to_thread(
+            recompute_product_rating_task.apply_async,
+            (product_id,),
+            countdown=RATING_RECOMPUTE_DELAY,
+        )
+    except (OperationalError, OSError) as e:
+        logger.warning(f"Rating recompute was not scheduled for product {product_id}: {e}")
+        try:
+            await redis_client.delete(key)
+        except RedisError as e:
+            logger.warning(f"Rating recompute mark was not released: {e}")
+
+
+async def reviews_changed(product_id: int) -> None:
+    """Вызывать после коммита любого изменения отзывов продукта."""
+    await invalidate_review_summary(product_id)
+    if RATING_UPDATE_MODE == "deferred":
+        # Карточку продукта сбросит задача после пересчета рейтинга.
+        await schedule_rating_recompute(product_id)
+    else:
+        await product_cache.invalidate(product_id)
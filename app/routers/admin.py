@@ -8,12 +8,17 @@ from fastapi import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.backend.db import get_engine_pools
 from app.backend.db_depends import get_db
+from app.backend.pool import get_pool_status
 from app.models.user import User
 from app.models.review import Review
+from app.routers.services.auth import principal_cache
 from app.routers.services.permissions import only_admin_permission
 from app.routers.services.utils import get_object_or_404
-from app.models.services.products_utils import update_product_rating
+from app.models.services.products_utils import register_review_grade
+from app.models.services.review_utils import reviews_changed
+from app.schemas.pool import PoolStatusSchema
 from app.schemas.review import ReviewRetriveSchema, ReviewChangeStatusSchema
 from app.schemas.user import (
     UserRetriveScehema,
@@ -45,6 +50,7 @@ async def change_user_status_by_admin(
     target_user.is_customer = user_data.is_customer
     await db.commit()
     await db.refresh(target_user)
+    await principal_cache.invalidate(user_id)
     return target_user
 
 
@@ -54,9 +60,10 @@ async def delete_user(
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """Роут чисто для админа (`is_admin == True`), удаление пользовтелей."""
-    target_user = get_object_or_404(db, User, User.id == user_id)
+    target_user = await get_object_or_404(db, User, User.id == user_id)
     await db.delete(target_user)
     await db.commit()
+    await principal_cache.invalidate(user_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -73,8 +80,24 @@ async def change_review_status(
 ):
     """Роут чисто для админа (`is_admin == True`), скрыть отзыв."""
     review = await get_object_or_404(db, Review, Review.id == review_id)
+    if review.is_active != review_status.is_active:
+        count_delta = 1 if review_status.is_active else -1
+        await register_review_grade(db, review.product_id, review.grade, count_delta)
     review.is_active = review_status.is_active
     await db.commit()
+    await reviews_changed(review.product_id)
     await db.refresh(review)
-    await update_product_rating(db, review.product_id)
     return review
+
+
+@router.get(
+    "/db_pool",
+    response_model=dict[str, PoolStatusSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def get_db_pool_status():
+    """
+    Роут чисто для админа (`is_admin == True`), состояние пулов соединений с бд
+    (primary и реплики) в текущем воркере.
+    """
+    return {name: get_pool_status(pool) for name, pool in get_engine_pools().items()}
@@ -18,17 +18,22 @@ from app.schemas.user import (
     UserRetriveScehema,
 )
 from app.models.services.exceptions import UserValidationException
+from app.routers.services.rate_limit import auth_rate_limit
 from app.routers.services.auth import (
     authenticate_user,
     create_access_token,
-    bcrypt_context,
+    password_hasher,
 )
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/token", status_code=status.HTTP_200_OK)
+@router.post(
+    "/token",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(auth_rate_limit)],
+)
 async def get_token(
     db: Annotated[AsyncSession, Depends(get_db)],
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
@@ -38,6 +43,8 @@ async def get_token(
     acess_token = await create_access_token(
         user_id=user.id,
         email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name,
         is_admin=user.is_admin,
         is_supplier=user.is_supplier,
         is_customer=user.is_customer,
@@ -53,16 +60,18 @@ async def get_token(
     "/registeration",
     response_model=UserRetriveScehema,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(auth_rate_limit)],
 )
 async def create_user(
     db: Annotated[AsyncSession, Depends(get_db)],
     user_data: UserCreateSchema,
 ):
     """Регистрация пользователя."""
+    password_hash = await password_hasher.hash(user_data.password)
     try:
         user = User(
             email=user_data.email,
-            password=bcrypt_context.hash(user_data.password),
+            password=password_hash,
             first_name=user_data.first_name,
             last_name=user_data.last_name,
         )
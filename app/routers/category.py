@@ -7,11 +7,13 @@ from fastapi import (
     Response,
     status,
 )
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.backend.db_depends import get_db
 from app.routers.services.utils import get_object_or_404
+from app.models.services.category_utils import category_cache
+from app.routers.services.serialization import SchemaResponse
+from app.routers.services.rate_limit import write_rate_limit
 from app.routers.services.permissions import (
     only_admin_permission,
     only_auth_user_permission,
@@ -26,21 +28,23 @@ from app.schemas.category import (
 
 router = APIRouter(prefix="/category", tags=["category"])
 
+category_list_response = SchemaResponse(list[CategoryRetriveSchema])
+
 
 @router.get("/", response_model=list[CategoryRetriveSchema], status_code=status.HTTP_200_OK)
 async def get_all_categories(
-    db: Annotated[AsyncSession, Depends(get_db)],
     _: Annotated[User, Depends(only_auth_user_permission)],
 ):
-    """Список категорий."""
-    categories = await db.scalars(
-        select(Category)
-        .where(Category.is_active == True)
-    )
-    return categories.all()
+    """Список категорий (из кеша категорий)."""
+    return category_list_response(await category_cache.get_active())
 
 
-@router.post("/", response_model=CategoryRetriveSchema, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=CategoryRetriveSchema,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(write_rate_limit)],
+)
 async def create_category(
     db: Annotated[AsyncSession, Depends(get_db)],
     category_data: CategoryCreateSchema,
@@ -54,10 +58,16 @@ async def create_category(
     db.add(new_category)
     await db.commit()
     await db.refresh(new_category)
+    await category_cache.invalidate()
     return new_category
 
 
-@router.put("/{category_id}", response_model=CategoryRetriveSchema, status_code=status.HTTP_200_OK)
+@router.put(
+    "/{category_id}",
+    response_model=CategoryRetriveSchema,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(write_rate_limit)],
+)
 async def udate_category(
     category_id: int,
     category_data: CategoryCreateSchema,
@@ -70,10 +80,15 @@ async def udate_category(
     category.slug = slugify(category_data.name)
     await db.commit()
     await db.refresh(category)
+    await category_cache.invalidate()
     return category
 
 
-@router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{category_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(write_rate_limit)],
+)
 async def delete_category(
     category_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -83,4 +98,5 @@ async def delete_category(
     category = await get_object_or_404(db, Category, Category.id == category_id)
     await db.delete(category)
     await db.commit()
+    await category_cache.invalidate()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response, status
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.backend.metrics import render_metrics
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def get_metrics():
+    """Метрики для prometheus (доступ ограничивать на уровне сети/прокси)."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
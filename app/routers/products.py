@@ -1,4 +1,5 @@
-from typing import Annotated
+from datetime import datetime
+from typing import Annotated, Literal
 
 from fastapi import (
     APIRouter,
@@ -7,110 +8,261 @@ from fastapi import (
     Response,
     status,
     Query,
+    Request,
 )
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.settings import (
+    PAGINATION_DEFAULT_LIMIT,
+    PAGINATION_MAX_LIMIT,
+    PRODUCT_BATCH_MAX_IDS,
+)
+from app.backend.db import async_session_maker
+from app.backend.db_depends import get_db, get_read_db
 from app.models.user import User
 from app.models.products import Product
-from app.models.category import Category
 from app.schemas.product import (
+    ProductBatchSchema,
+    ProductBulkImportResultSchema,
     ProductCreateSchema,
+    ProductPageSchema,
     ProductRetriveSchema,
 )
 from app.routers.services.utils import get_object_or_404
+from app.routers.services.filters import ProductListParams
+from app.routers.services.serialization import SchemaResponse
 from app.models.services.exceptions import ProductValidationException
+from app.models.services.category_utils import category_cache
+from app.models.services.product_cache import product_cache
+from app.models.services.products_import import import_products
+from app.models.services.products_export import (
+    export_csv,
+    export_ndjson,
+    iter_export_rows,
+)
+from app.models.services.projections import PRODUCT_PROJECTION, select_products
 from app.models.services.products_utils import (
     create_product_helper,
+    is_slug_conflict,
     update_product_helper,
 )
+from app.routers.services.idempotency import IdempotencyKey, idempotent
+from app.routers.services.rate_limit import write_rate_limit
 from app.routers.services.permissions import (
+    only_admin_permission,
     only_auth_user_permission,
 )
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+product_page_response = SchemaResponse(ProductPageSchema)
+product_list_response = SchemaResponse(list[ProductRetriveSchema])
+product_response = SchemaResponse(ProductRetriveSchema)
+product_batch_response = SchemaResponse(ProductBatchSchema)
 
-@router.get("/", response_model=list[ProductRetriveSchema], status_code=status.HTTP_200_OK)
+
+@router.get("/", response_model=ProductPageSchema, status_code=status.HTTP_200_OK)
 async def get_list_products(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     _: Annotated[User, Depends(only_auth_user_permission)],
-    by_category_id: Annotated[int | None, Query()] = None,
+    params: Annotated[ProductListParams, Depends()],
 ):
-    """Список продуктов."""
-    # TODO возможно эту логику можно перенести в фильтр/Depends
-    if by_category_id is not None:
-        category = await get_object_or_404(db, Category, Category.id == by_category_id)
-        products = await db.scalars(
-            select(Product)
-            .where(Product.category_id == category.id)
-            .where(Product.is_active == True)
-            .options(
-                selectinload(Product.author),
-                selectinload(Product.category),
-            )
-        )
-    else:
-        products = await db.scalars(
-            select(Product)
-            .where(Product.is_active == True)
-            .options(
-                selectinload(Product.author),
-                selectinload(Product.category),
-            )
-        )
-    return products.all()
+    """
+    Список продуктов: фильтры, сортировка и keyset пагинация
+    (курсор следующей страницы в `next_cursor`) одним запросом
+    с join-ами и выборкой только нужных колонок, без ORM объектов.
+    """
+    if params.by_category_id is not None:
+        # Проверка по кешу категорий, без отдельного запроса в бд.
+        await category_cache.get_or_404(params.by_category_id)
+    rows = (await db.execute(params.apply(select_products()))).all()
+    rows, next_cursor = params.paginate(list(rows))
+    return product_page_response(
+        {"items": PRODUCT_PROJECTION.to_dicts(rows), "next_cursor": next_cursor}
+    )
 
 
-@router.post("/", response_model=ProductRetriveSchema, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=ProductRetriveSchema,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(write_rate_limit)],
+)
 async def create_product(
+    request: Request,
     db: Annotated[AsyncSession, Depends(get_db)],
     product_data: ProductCreateSchema,
     user: Annotated[User, Depends(only_auth_user_permission)],
+    idempotency_key: IdempotencyKey = None,
 ):
-    """Создание продукта."""
-    try:
-        product = await create_product_helper(db, user, product_data)
-        return product
-    except ProductValidationException as e:
+    """Создание продукта (повтор с тем же `Idempotency-Key` вернет первый ответ)."""
+    async def create() -> Response:
+        try:
+            product = await create_product_helper(db, user, product_data)
+            return product_response(product, status_code=status.HTTP_201_CREATED)
+        except ProductValidationException as e:
+            raise HTTPException(
+                detail=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        except IntegrityError as e:
+            # Slug подбирается свободным, конфликт возможен только при гонке создания.
+            raise HTTPException(
+                detail="Slug already exists" if is_slug_conflict(e) else "Invalid product data",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+    return await idempotent(idempotency_key, request, user.id, create)
+
+
+@router.get("/search", response_model=list[ProductRetriveSchema], status_code=status.HTTP_200_OK)
+async def search_products(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    _: Annotated[User, Depends(only_auth_user_permission)],
+    q: Annotated[str, Query(min_length=1, max_length=256)],
+    category_id: Annotated[int | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=PAGINATION_MAX_LIMIT)] = PAGINATION_DEFAULT_LIMIT,
+    offset: Annotated[int, Query(ge=0)] = 0,
+):
+    """Полнотекстовый поиск по названию и описанию (GIN индекс), сортировка по релевантности."""
+    ts_query = func.websearch_to_tsquery("simple", q)
+    query = (
+        select_products()
+        .where(Product.search_vector.op("@@")(ts_query))
+        .where(Product.is_active == True)
+        .order_by(func.ts_rank(Product.search_vector, ts_query).desc(), Product.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+    rows = (await db.execute(query)).all()
+    return product_list_response(PRODUCT_PROJECTION.to_dicts(rows))
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_products(
+    _: Annotated[User, Depends(only_admin_permission)],
+    export_format: Annotated[Literal["ndjson", "csv"], Query(alias="format")] = "ndjson",
+    category_id: Annotated[int | None, Query()] = None,
+    updated_since: Annotated[datetime | None, Query()] = None,
+):
+    """Выгрузка всего каталога активных продуктов (NDJSON/CSV) потоком, без загрузки в память."""
+    rows = iter_export_rows(category_id, updated_since)
+    if export_format == "csv":
+        return StreamingResponse(export_csv(rows), media_type="text/csv")
+    return StreamingResponse(export_ndjson(rows), media_type="application/x-ndjson")
+
+
+@router.post(
+    "/bulk",
+    response_model=ProductBulkImportResultSchema,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(write_rate_limit)],
+)
+async def bulk_import_products(
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    user: Annotated[User, Depends(only_auth_user_permission)],
+):
+    """
+    Массовый импорт продуктов из тела запроса: NDJSON (по умолчанию)
+    или CSV (`Content-Type: text/csv`, первая строка - заголовок).
+    Совпадающие названия получают slug с числовым суффиксом, как в `POST /products/`.
+    """
+    is_csv = "csv" in request.headers.get("content-type", "")
+    result = await import_products(db, user, request.stream(), is_csv)
+    return result.as_dict()
+
+
+@router.get("/batch", response_model=ProductBatchSchema, status_code=status.HTTP_200_OK)
+async def get_products_batch(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    _: Annotated[User, Depends(only_auth_user_permission)],
+    ids: Annotated[str, Query(pattern=r"^\d{1,9}(,\d{1,9})*$", description="id через запятую")],
+):
+    """
+    Несколько продуктов одним запросом (корзина, избранное): порядок как в `ids`,
+    отсутствующие и неактивные id - в `missing`.
+    """
+    product_ids = list(dict.fromkeys(int(product_id) for product_id in ids.split(",")))
+    if len(product_ids) > PRODUCT_BATCH_MAX_IDS:
         raise HTTPException(
-            detail=str(e),
-            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many ids, max {PRODUCT_BATCH_MAX_IDS}",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         )
-    except IntegrityError:
-        # TODO по хорошему вычилять именно ошибку slug, а не все.
-        raise HTTPException(
-            detail="Slug already exists",
-            status_code=status.HTTP_400_BAD_REQUEST,
+    rows = await db.execute(
+        select_products()
+        .where(Product.id.in_(product_ids))
+        .where(Product.is_active == True)
+    )
+    products = {row.id: PRODUCT_PROJECTION.to_dict(row) for row in rows.all()}
+    return product_batch_response({
+        "items": [products[product_id] for product_id in product_ids if product_id in products],
+        "missing": [product_id for product_id in product_ids if product_id not in products],
+    })
+
+
+@router.get(
+    "/by-slug/{slug}",
+    response_model=ProductRetriveSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def get_product_by_slug(
+    slug: str,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    _: Annotated[User, Depends(only_auth_user_permission)],
+):
+    """Получение продукта по slug (уникальный индекс, один запрос)."""
+    row = (
+        await db.execute(
+            select_products()
+            .where(Product.slug == slug)
+            .where(Product.is_active == True)
         )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    return product_response(PRODUCT_PROJECTION.to_dict(row))
 
 
 @router.get("/{product_id}", response_model=ProductRetriveSchema, status_code=status.HTTP_200_OK)
 async def get_product(
     product_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
     _: Annotated[User, Depends(only_auth_user_permission)],
 ):
-    """Получение конкретного продукта."""
-    product = await db.scalar(
-        select(Product)
-        .where(Product.id == product_id)
-        .where(Product.is_active == True)
-        .options(
-            selectinload(Product.author),
-            selectinload(Product.category),
-        )
-    )
+    """
+    Получение конкретного продукта: готовый json из кеша карточек,
+    соединение с бд берется только при промахе.
+    Промах читается с primary: карточка с отстающей реплики сохранилась бы
+    под уже увеличенной версией продукта и отдавалась бы до `PRODUCT_CACHE_TTL`.
+    """
+    async def load_product() -> bytes | None:
+        async with async_session_maker() as db:
+            row = (
+                await db.execute(
+                    select_products()
+                    .where(Product.id == product_id)
+                    .where(Product.is_active == True)
+                )
+            ).first()
+        return None if row is None else product_response.dump(PRODUCT_PROJECTION.to_dict(row))
 
-    if not product:
+    payload = await product_cache.get_or_load(product_id, load_product)
+    if payload is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
-    return product
+    return Response(payload, media_type=product_response.media_type)
 
 
-@router.put("/{product_id}", response_model=ProductRetriveSchema, status_code=status.HTTP_200_OK)
+@router.put(
+    "/{product_id}",
+    response_model=ProductRetriveSchema,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(write_rate_limit)],
+)
 async def update_product(
     product_id: int,
     product_data: ProductCreateSchema,
@@ -127,6 +279,7 @@ async def update_product(
                 product,
                 product_data,
             )
+            await product_cache.invalidate(product_id)
             return product_with_related_fields
         raise HTTPException(
             detail="Not product owner",
@@ -137,15 +290,19 @@ async def update_product(
             detail=str(e),
             status_code=status.HTTP_400_BAD_REQUEST,
         )
-    except IntegrityError:
-        # TODO по хорошему вычилять именно ошибку slug, а не все.
+    except IntegrityError as e:
+        # Slug подбирается свободным, конфликт возможен только при гонке создания.
         raise HTTPException(
-            detail="Slug already exists",
+            detail="Slug already exists" if is_slug_conflict(e) else "Invalid product data",
             status_code=status.HTTP_400_BAD_REQUEST,
         )
 
 
-@router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{product_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(write_rate_limit)],
+)
 async def delete_product(
     product_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -156,6 +313,7 @@ async def delete_product(
     if request_user.id == product.author_id:
         await db.delete(product)
         await db.commit()
+        await product_cache.invalidate(product_id)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     raise HTTPException(
         detail="Not product owner",
@@ -4,35 +4,49 @@ from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
+    Request,
     Response,
     status,
 )
 
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_db, get_read_db
 from app.models.user import User
 from app.models.products import Product
 from app.models.review import Review
 from app.routers.services.utils import get_object_or_404
+from app.routers.services.idempotency import IdempotencyKey, idempotent
+from app.routers.services.rate_limit import write_rate_limit
 from app.routers.services.permissions import only_auth_user_permission
+from app.routers.services.filters import ReviewListParams
+from app.routers.services.serialization import SchemaResponse
 from app.models.services.exceptions import ReviewValidationException
-from app.models.services.products_utils import update_product_rating
-from app.models.services.review_utils import create_review_helper
+from app.models.services.products_utils import register_review_grade
+from app.models.services.review_utils import (
+    create_review_helper,
+    get_review_summary,
+    reviews_changed,
+)
+from app.models.services.projections import REVIEW_PROJECTION, select_reviews
 from app.schemas.review import (
     ReviewCreateSchema,
+    ReviewPageSchema,
     ReviewRetriveSchema,
+    ReviewSummarySchema,
 )
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+review_page_response = SchemaResponse(ReviewPageSchema)
+review_response = SchemaResponse(ReviewRetriveSchema)
+
 
 @router.delete(
     "/reviews/{review_id}",
     status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(write_rate_limit)],
 )
 async def delete_self_review(
     review_id: int,
@@ -42,10 +56,11 @@ async def delete_self_review(
     """Удалить собственный отзыв (только для автора)."""
     review = await get_object_or_404(db, Review, Review.id == review_id)
     if review.author_id == user.id:
-        product_id: int = review.product_id
+        if review.is_active:
+            await register_review_grade(db, review.product_id, review.grade, -1)
         await db.delete(review)
         await db.commit()
-        await update_product_rating(db, product_id)
+        await reviews_changed(review.product_id)
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     raise HTTPException(
         detail="Not author",
@@ -55,50 +70,72 @@ async def delete_self_review(
 
 @router.get(
     "/{product_id}/reviews",
-    response_model=list[ReviewRetriveSchema],
+    response_model=ReviewPageSchema,
     status_code=status.HTTP_200_OK,
 )
 async def get_product_rewiews(
     product_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     _: Annotated[User, Depends(only_auth_user_permission)],
+    params: Annotated[ReviewListParams, Depends()],
 ):
-    """Получить все отзывы товара."""
+    """Отзывы товара, новые первыми (keyset пагинация, курсор в `next_cursor`)."""
     product = await get_object_or_404(db, Product, Product.id == product_id)
-    rewiews = await db.scalars(
-        select(Review)
-        .where(Review.product_id == product.id)
-        .where(Review.is_active == True)
-        .options(
-            selectinload(Review.author),
+    rewiews = await db.execute(
+        params.apply(
+            select_reviews()
+            .where(Review.product_id == product.id)
+            .where(Review.is_active == True)
         )
     )
-    return rewiews.all()
+    rows, next_cursor = params.paginate(list(rewiews.all()))
+    return review_page_response(
+        {"items": REVIEW_PROJECTION.to_dicts(rows), "next_cursor": next_cursor}
+    )
+
+
+@router.get(
+    "/{product_id}/reviews/summary",
+    response_model=ReviewSummarySchema,
+    status_code=status.HTTP_200_OK,
+)
+async def get_product_reviews_summary(
+    product_id: int,
+    _: Annotated[User, Depends(only_auth_user_permission)],
+):
+    """Распределение оценок (0-10) активных отзывов товара (кешируется в redis)."""
+    return await get_review_summary(product_id)
 
 
 @router.post(
     "/{product_id}/reviews",
     response_model=ReviewRetriveSchema,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(write_rate_limit)],
 )
 async def create_review(
+    request: Request,
     review_data: ReviewCreateSchema,
     product_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
     user: Annotated[User, Depends(only_auth_user_permission)],
+    idempotency_key: IdempotencyKey = None,
 ):
-    """Написать отзыв на товар."""
-    try:
-        review = await create_review_helper(db, product_id, user, review_data)
-        return review
-    except ReviewValidationException as e:
-        raise HTTPException(
-            detail=str(e),
-            status_code=status.HTTP_400_BAD_REQUEST,
-        )
-    except IntegrityError:
-        # TODO по хорошему вычилять именно ошибку дубля, а не все.
-        raise HTTPException(
-            detail="User already rewiew this product",
-            status_code=status.HTTP_400_BAD_REQUEST,
-        )
+    """Написать отзыв на товар (повтор с тем же `Idempotency-Key` вернет первый ответ)."""
+    async def create() -> Response:
+        try:
+            review = await create_review_helper(db, product_id, user, review_data)
+            return review_response(review, status_code=status.HTTP_201_CREATED)
+        except ReviewValidationException as e:
+            raise HTTPException(
+                detail=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        except IntegrityError:
+            # TODO по хорошему вычилять именно ошибку дубля, а не все.
+            raise HTTPException(
+                detail="User already rewiew this product",
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+
+    return await idempotent(idempotency_key, request, user.id, create)
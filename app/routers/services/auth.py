@@ -1,5 +1,8 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Annotated, Any
+from typing import Annotated, Any, Awaitable, Callable, TypeVar
 
 from fastapi import (
     Depends,
@@ -7,22 +10,151 @@ from fastapi import (
     HTTPException,
 )
 from fastapi.security import OAuth2PasswordBearer
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
-from app.settings import SECRET_KEY, ALGORITHM
+from app.settings import (
+    SECRET_KEY,
+    ALGORITHM,
+    AUTH_TRUST_TOKEN_CLAIMS,
+    PRINCIPAL_CACHE_SIZE,
+    PRINCIPAL_CACHE_TTL,
+    PRINCIPAL_CACHE_CHECK_INTERVAL,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_QUEUE,
+)
+from app.backend.cache import TTLCache
 from app.backend.db_depends import get_db
+from app.backend.redis import redis_client
 from app.models.user import User
 from app.routers.services.utils import get_object_or_404
 
 
+ResultT = TypeVar("ResultT")
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class PrincipalCache:
+    """
+    In-process кеш отсоединенных от сессии пользователей по id.
+
+    Запись хранится вместе с версией пользователя из redis, версия увеличивается
+    при каждой инвалидации (`INCR`). Воркер сверяет версию записи не чаще раза
+    в `check_interval` секунд (как `CategoryCache`), поэтому изменения ролей
+    и удаление пользователя видны во всех воркерах не позже чем через `check_interval`,
+    а большинство запросов обходится без redis. Версия читается до загрузки пользователя
+    из бд: загрузка, пересекшаяся с инвалидацией, сохранится со старой версией
+    и будет перечитана. Если redis недоступен, записи отдаются без сверки до истечения
+    `ttl`, а redis опрашивается не чаще раза в `check_interval`.
+    """
+
+    def __init__(self, redis: Redis, maxsize: int, ttl: float, check_interval: float) -> None:
+        self.redis = redis
+        self.check_interval = check_interval
+        # user_id -> (версия, время сверки версии, пользователь).
+        self._local: TTLCache[int, tuple[int | None, float, User]] = TTLCache(maxsize, ttl)
+        self._redis_retry_at = 0.0
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f"cache:principal:{user_id}:version"
+
+    async def _get_version(self, user_id: int) -> int | None:
+        try:
+            return int(await self.redis.get(self._version_key(user_id)) or 0)
+        except RedisError as e:
+            logger.warning(f"Principal cache version check failed: {e}")
+            return None
+
+    async def get_or_load(
+        self,
+        user_id: int,
+        loader: Callable[[], Awaitable[User]],
+    ) -> User:
+        now = time.monotonic()
+        local = self._local.get(user_id)
+        if local is not None and (
+            now - local[1] < self.check_interval or now < self._redis_retry_at
+        ):
+            return local[2]
+        version = None
+        if now >= self._redis_retry_at:
+            version = await self._get_version(user_id)
+            if version is None:
+                # Не ждать таймаут redis на каждом запросе: следующая попытка через интервал.
+                self._redis_retry_at = now + self.check_interval
+        if local is not None:
+            if version is None:
+                return local[2]
+            if local[0] == version:
+                self._local.set(user_id, (version, now, local[2]))
+                return local[2]
+        user = await loader()
+        self._local.set(user_id, (version, now, user))
+        return user
+
+    async def invalidate(self, user_id: int) -> None:
+        """Вызывать после коммита изменений пользователя (в других воркерах - через redis)."""
+        self._local.invalidate(user_id)
+        try:
+            await self.redis.incr(self._version_key(user_id))
+        except RedisError as e:
+            logger.warning(f"Principal cache invalidation failed: {e}")
+
+
+principal_cache = PrincipalCache(
+    redis_client,
+    PRINCIPAL_CACHE_SIZE,
+    PRINCIPAL_CACHE_TTL,
+    PRINCIPAL_CACHE_CHECK_INTERVAL,
+)
+
+
+class PasswordHasher:
+    """
+    Выполнение bcrypt вне event loop.
+
+    bcrypt отпускает GIL, поэтому пул потоков загружает все ядра, не блокируя
+    остальные роуты воркера. Одновременно выполняется не больше `max_workers`
+    операций, еще `max_queue` ждут в очереди, остальные сразу получают 503.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="password_hasher")
+        self._max_pending = max_workers + max_queue
+        self._pending = 0
+
+    async def _run(self, func: Callable[..., ResultT], *args: Any) -> ResultT:
+        if self._pending >= self._max_pending:
+            raise HTTPException(
+                detail="Too many authentication requests, try again later",
+                headers={"Retry-After": "1"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(bcrypt_context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        return await self._run(bcrypt_context.verify, password, password_hash)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+
 async def authenticate_user(
     email: str,
     password: str,
@@ -30,7 +162,7 @@ async def authenticate_user(
 ) -> User:
     """Получение `email` и `password` для аутентификации пользоваля."""
     user = await db.scalar(select(User).where(User.email == email))
-    if not user or not bcrypt_context.verify(password, user.password):
+    if not user or not await password_hasher.verify(password, user.password):
         raise HTTPException(
             detail="Invalid auth creds",
             headers={"WWW-Authenticate": "Bearer"},
@@ -46,11 +178,18 @@ async def create_access_token(
     is_supplier: bool,
     is_customer: bool,
     expires_delta: timedelta,
+    first_name: str | None = None,
+    last_name: str | None = None,
 ) -> str:
-    """Создание access токена, время жизни зависит от `ACCESS_TOKEN_LIFETIME`."""
+    """
+    Создание access токена, время жизни зависит от `ACCESS_TOKEN_LIFETIME`.
+    Имя и фамилия нужны пользователю из claims (`AUTH_TRUST_TOKEN_CLAIMS`) для ответов.
+    """
     encode = {
         "id": user_id,
         "sub": email,
+        "first_name": first_name,
+        "last_name": last_name,
         "is_admin": is_admin,
         "is_supplier": is_supplier,
         "is_customer": is_customer,
@@ -60,6 +199,19 @@ async def create_access_token(
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def get_user_from_claims(payload: dict[str, Any]) -> User:
+    """Пользователь, собранный из подписанных claims токена (без обращения к бд)."""
+    return User(
+        id=payload.get("id"),
+        email=payload.get("sub"),
+        first_name=payload.get("first_name"),
+        last_name=payload.get("last_name"),
+        is_admin=payload.get("is_admin", False),
+        is_supplier=payload.get("is_supplier", False),
+        is_customer=payload.get("is_customer", True),
+    )
+
+
 async def decode_token_get_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -67,11 +219,21 @@ async def decode_token_get_user(
     """Декодирование токена, получение дынных из payload -> `User`."""
     try:
         payload: dict[str, Any] = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
-        user = await get_object_or_404(db, User, User.id == payload.get("id"))
-        return user
+        user_id = payload.get("id")
+        if not isinstance(user_id, int):
+            raise JWTError("Token has no user id")
     except JWTError:
         raise HTTPException(
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
             status_code=status.HTTP_401_UNAUTHORIZED,
         )
+    if AUTH_TRUST_TOKEN_CLAIMS:
+        return get_user_from_claims(payload)
+
+    async def load_user() -> User:
+        user = await get_object_or_404(db, User, User.id == user_id)
+        db.expunge(user)
+        return user
+
+    return await principal_cache.get_or_load(user_id, load_user)
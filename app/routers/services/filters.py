@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import Annotated, Any, Literal
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, tuple_
+
+from app.settings import PAGINATION_DEFAULT_LIMIT, PAGINATION_MAX_LIMIT
+from app.models.products import Product
+from app.models.review import Review
+from app.routers.services.pagination import decode_cursor, encode_cursor
+
+
+ProductSort = Literal["id", "newest", "price", "-price", "rating", "-rating"]
+
+# Сортировка -> (колонка, тип значения в курсоре, по убыванию). Вторым ключом всегда идет `id`.
+PRODUCT_SORTS: dict[str, tuple[Any, type | None, bool]] = {
+    "id": (None, None, False),
+    "newest": (None, None, True),
+    "price": (Product.price, int, False),
+    "-price": (Product.price, int, True),
+    "rating": (Product.rating, float, False),
+    "-rating": (Product.rating, float, True),
+}
+
+
+class ProductListParams:
+    """
+    Фильтры, сортировка и keyset пагинация списка продуктов.
+
+    Каждой комбинации фильтр + сортировка соответствует частичный индекс
+    `WHERE is_active`, курсор хранит значения ключа сортировки последней записи.
+    """
+
+    def __init__(
+        self,
+        by_category_id: Annotated[int | None, Query()] = None,
+        min_price: Annotated[int | None, Query(ge=0)] = None,
+        max_price: Annotated[int | None, Query(ge=0)] = None,
+        min_rating: Annotated[float | None, Query(ge=0, le=10)] = None,
+        in_stock: Annotated[bool | None, Query()] = None,
+        author_id: Annotated[int | None, Query()] = None,
+        sort: Annotated[ProductSort, Query()] = "id",
+        limit: Annotated[int, Query(ge=1, le=PAGINATION_MAX_LIMIT)] = PAGINATION_DEFAULT_LIMIT,
+        after: Annotated[str | None, Query()] = None,
+    ) -> None:
+        self.by_category_id = by_category_id
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_rating = min_rating
+        self.in_stock = in_stock
+        self.author_id = author_id
+        self.sort = sort
+        self.limit = limit
+        self.after = after
+
+    def apply(self, query: Select) -> Select:
+        """Фильтры + порядок + условие курсора + `LIMIT limit + 1` (признак следующей страницы)."""
+        query = query.where(Product.is_active == True)
+        if self.by_category_id is not None:
+            query = query.where(Product.category_id == self.by_category_id)
+        if self.min_price is not None:
+            query = query.where(Product.price >= self.min_price)
+        if self.max_price is not None:
+            query = query.where(Product.price <= self.max_price)
+        if self.min_rating is not None:
+            query = query.where(Product.rating >= self.min_rating)
+        if self.in_stock is not None:
+            query = query.where(Product.stock > 0 if self.in_stock else Product.stock == 0)
+        if self.author_id is not None:
+            query = query.where(Product.author_id == self.author_id)
+
+        column, value_type, descending = PRODUCT_SORTS[self.sort]
+        key = (Product.id,) if column is None else (column, Product.id)
+        if self.after is not None:
+            types = (int,) if value_type is None else (value_type, int)
+            values = decode_cursor(self.after, *types)
+            key_value = tuple_(*key)
+            query = query.where(
+                key_value < tuple_(*values) if descending else key_value > tuple_(*values)
+            )
+        order_by = [item.desc() if descending else item for item in key]
+        return query.order_by(*order_by).limit(self.limit + 1)
+
+    def paginate(self, products: list[Any]) -> tuple[list[Any], str | None]:
+        """Обрезка лишней записи -> (страница, курсор следующей страницы или `None`)."""
+        if len(products) <= self.limit:
+            return products, None
+        products = products[:self.limit]
+        column = PRODUCT_SORTS[self.sort][0]
+        last = products[-1]
+        if column is None:
+            return products, encode_cursor(last.id)
+        return products, encode_cursor(getattr(last, column.key), last.id)
+
+
+class ReviewListParams:
+    """
+    Keyset пагинация отзывов продукта: новые первыми, ключ `(datetime_created, id)`
+    (индекс `ix_reviews_product_active_created`).
+    """
+
+    def __init__(
+        self,
+        limit: Annotated[int, Query(ge=1, le=PAGINATION_MAX_LIMIT)] = PAGINATION_DEFAULT_LIMIT,
+        after: Annotated[str | None, Query()] = None,
+    ) -> None:
+        self.limit = limit
+        self.after = after
+
+    def apply(self, query: Select) -> Select:
+        key = tuple_(Review.datetime_created, Review.id)
+        if self.after is not None:
+            created, review_id = decode_cursor(self.after, str, int)
+            try:
+                created = datetime.fromisoformat(created)
+            except ValueError:
+                raise HTTPException(
+                    detail="Invalid cursor",
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+            query = query.where(key < tuple_(created, review_id))
+        order_by = (Review.datetime_created.desc(), Review.id.desc())
+        return query.order_by(*order_by).limit(self.limit + 1)
+
+    def paginate(self, reviews: list[Any]) -> tuple[list[Any], str | None]:
+        if len(reviews) <= self.limit:
+            return reviews, None
+        reviews = reviews[:self.limit]
+        last = reviews[-1]
+        return reviews, encode_cursor(last.datetime_created.isoformat(), last.id)
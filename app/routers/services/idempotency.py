@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import json
+from typing import Annotated, Awaitable, Callable
+
+from fastapi import Header, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from loguru import logger
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.settings import IDEMPOTENCY_LOCK_TTL, IDEMPOTENCY_TTL
+from app.backend.redis import redis_client
+
+
+IdempotencyKey = Annotated[str | None, Header(alias="Idempotency-Key", max_length=255)]
+
+
+class IdempotencyStore:
+    """
+    Хранилище ответов для повторов запросов с заголовком `Idempotency-Key` (redis).
+
+    Первый запрос занимает ключ (`SET NX`, отметка "в работе" на `lock_ttl` сек.),
+    выполняется и сохраняет статус и тело ответа на `ttl` сек. Повторы с тем же ключом
+    получают сохраненный ответ без выполнения, параллельные повторы ждут завершения первого.
+    Ключ с другим телом запроса - 422. Ответы 5xx и исключения не сохраняются:
+    ключ освобождается и повтор выполнится заново.
+    Если redis недоступен при занятии ключа, запрос выполняется без защиты от повторов,
+    если при чтении ответа для уже распознанного повтора - 503 без выполнения.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(self, redis: Redis, ttl: int, lock_ttl: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        func: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        try:
+            is_first = await self.redis.set(
+                key,
+                json.dumps({"fingerprint": fingerprint, "pending": True}),
+                nx=True,
+                ex=self.lock_ttl,
+            )
+        except RedisError as e:
+            logger.warning(f"Idempotency store unavailable: {e}")
+            return await func()
+        if not is_first:
+            try:
+                return await self._replay(key, fingerprint)
+            except RedisError as e:
+                # Повтор уже распознан: выполнять запрос второй раз нельзя.
+                logger.warning(f"Idempotency replay failed: {e}")
+                raise HTTPException(
+                    detail="Idempotency store unavailable, retry later",
+                    headers={"Retry-After": "1"},
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+
+        try:
+            response = await func()
+        except HTTPException as e:
+            if e.status_code >= 500:
+                await self._release(key)
+                raise
+            response = JSONResponse(
+                {"detail": e.detail},
+                status_code=e.status_code,
+                headers=e.headers,
+            )
+        except BaseException:
+            await self._release(key)
+            raise
+
+        if response.status_code >= 500:
+            await self._release(key)
+            return response
+        stored = {
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "media_type": response.media_type,
+            "body": bytes(response.body).decode(),
+        }
+        try:
+            await self.redis.set(key, json.dumps(stored), ex=self.ttl)
+        except RedisError as e:
+            logger.warning(f"Idempotency response was not stored: {e}")
+        return response
+
+    async def _replay(self, key: str, fingerprint: str) -> Response:
+        for _ in range(int(self.lock_ttl / self.poll_interval)):
+            raw = await self.redis.get(key)
+            if raw is None:
+                break
+            stored = json.loads(raw)
+            if stored["fingerprint"] != fingerprint:
+                raise HTTPException(
+                    detail="Idempotency-Key is already used with a different request",
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if not stored.get("pending"):
+                return Response(
+                    stored["body"],
+                    status_code=stored["status"],
+                    media_type=stored["media_type"],
+                    headers={"Idempotent-Replayed": "true"},
+                )
+            await asyncio.sleep(self.poll_interval)
+        # Первый запрос не сохранил ответ (ошибка) или выполняется слишком долго.
+        raise HTTPException(
+            detail="Request with this Idempotency-Key is in progress or failed, retry later",
+            headers={"Retry-After": "1"},
+            status_code=status.HTTP_409_CONFLICT,
+        )
+
+    async def _release(self, key: str) -> None:
+        try:
+            await self.redis.delete(key)
+        except RedisError as e:
+            logger.warning(f"Idempotency key was not released: {e}")
+
+
+idempotency_store = IdempotencyStore(redis_client, IDEMPOTENCY_TTL, IDEMPOTENCY_LOCK_TTL)
+
+
+async def idempotent(
+    idempotency_key: str | None,
+    request: Request,
+    user_id: int,
+    func: Callable[[], Awaitable[Response]],
+) -> Response:
+    """
+    Выполнение `func` с учетом `Idempotency-Key` (без заголовка - просто выполнение).
+    Ключи разделены по пользователю и роуту, отпечаток запроса - метод, путь и тело.
+    """
+    if idempotency_key is None:
+        return await func()
+    body = await request.body()
+    fingerprint = hashlib.sha256(
+        b"%b %b\n%b" % (request.method.encode(), request.url.path.encode(), body)
+    ).hexdigest()
+    route = request.scope["route"].path if "route" in request.scope else request.url.path
+    key = f"idempotency:{user_id}:{request.method}:{route}:{idempotency_key}"
+    return await idempotency_store.run(key, fingerprint, func)
@@ -0,0 +1,28 @@
+import base64
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values: Any) -> str:
+    """Упаковка значений ключа последней записи страницы в непрозрачный курсор."""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> list[Any]:
+    """Распаковка курсора, полученного от клиента, -> список значений ключа ожидаемых типов."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != len(types) or not all(
+        isinstance(value, type_) for value, type_ in zip(values, types)
+    ):
+        raise HTTPException(
+            detail="Invalid cursor",
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    return values
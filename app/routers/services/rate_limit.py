@@ -0,0 +1,55 @@
+import math
+from typing import Literal
+
+from fastapi import HTTPException, Request, status
+from jose import JWTError, jwt
+
+from app.settings import ALGORITHM, RATE_LIMIT_ENABLED, RATE_LIMITS, SECRET_KEY
+from app.backend.rate_limit import rate_limiter
+
+
+class RateLimit:
+    """
+    Зависимость-лимитер по правилу из `RATE_LIMITS`: 429 с `Retry-After` при превышении.
+
+    Подключается через `dependencies=[Depends(RateLimit(...))]` декоратора роута:
+    такие зависимости выполняются первыми, до обращений к бд и проверки пароля.
+    `by="user"` - лимит на пользователя из токена (только проверка подписи, без бд),
+    для запросов без валидного токена - на ip.
+    """
+
+    def __init__(self, rule: str, by: Literal["ip", "user"] = "ip") -> None:
+        if rule not in RATE_LIMITS:
+            raise ValueError(f"Unknown rate limit rule: {rule}")
+        self.rule = rule
+        self.by = by
+
+    def _identity(self, request: Request) -> str:
+        if self.by == "user":
+            scheme, _, token = request.headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    user_id = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM).get("id")
+                except JWTError:
+                    user_id = None
+                if isinstance(user_id, int):
+                    return f"user:{user_id}"
+        # За прокси адрес клиента проставляет uvicorn (--proxy-headers / --forwarded-allow-ips).
+        return f"ip:{request.client.host if request.client else 'unknown'}"
+
+    async def __call__(self, request: Request) -> None:
+        if not RATE_LIMIT_ENABLED:
+            return
+        capacity, period = RATE_LIMITS[self.rule]
+        key = f"ratelimit:{self.rule}:{self._identity(request)}"
+        retry_after = await rate_limiter.acquire(key, capacity, period)
+        if retry_after > 0:
+            raise HTTPException(
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+
+auth_rate_limit = RateLimit("auth")
+write_rate_limit = RateLimit("write", by="user")
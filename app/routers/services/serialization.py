@@ -0,0 +1,26 @@
+from typing import Any
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+class SchemaResponse:
+    """
+    Быстрый путь ответа: схема компилируется в `TypeAdapter` один раз при импорте,
+    ORM объекты валидируются один раз (`from_attributes`) и сразу сериализуются
+    в json байты на стороне pydantic-core.
+
+    Роут возвращает готовый `Response`, поэтому FastAPI не валидирует ответ
+    повторно по `response_model` (он остается только для документации).
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, schema: Any) -> None:
+        self.adapter: TypeAdapter[Any] = TypeAdapter(schema)
+
+    def dump(self, data: Any) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(data, from_attributes=True))
+
+    def __call__(self, data: Any, status_code: int = status.HTTP_200_OK) -> Response:
+        return Response(self.dump(data), status_code=status_code, media_type=self.media_type)
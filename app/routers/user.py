@@ -6,17 +6,20 @@ from fastapi import (
     HTTPException,
     status,
 )
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.backend.db_depends import get_db
+from app.backend.db_depends import get_db, get_read_db
 from app.models.user import User
 from app.routers.services.utils import get_object_or_404
 from app.models.services.exceptions import UserValidationException
+from app.models.services.projections import USER_PROJECTION
 from app.schemas.user import (
     UserRetriveScehema,
     UserUpdateSchema,
 )
+from app.routers.services.auth import principal_cache
+from app.routers.services.serialization import SchemaResponse
+from app.routers.services.rate_limit import write_rate_limit
 from app.routers.services.permissions import (
     only_auth_user_permission,
 )
@@ -24,15 +27,17 @@ from app.routers.services.permissions import (
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+user_list_response = SchemaResponse(list[UserRetriveScehema])
+
 
 @router.get("/", response_model=list[UserRetriveScehema], status_code=status.HTTP_200_OK)
 async def get_list_users(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     _: Annotated[User, Depends(only_auth_user_permission)],
 ):
     """Список пользователей."""
-    users = await db.scalars(select(User))
-    return users.all()
+    users = await db.execute(USER_PROJECTION.select())
+    return user_list_response(USER_PROJECTION.to_dicts(users.all()))
 
 
 @router.get("/current", response_model=UserRetriveScehema, status_code=status.HTTP_200_OK)
@@ -46,7 +51,7 @@ async def get_current_user(
 @router.get("/{user_id}", response_model=UserRetriveScehema, status_code=status.HTTP_200_OK)
 async def get_user(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     _: Annotated[User, Depends(only_auth_user_permission)],
 ):
     """Пользователь по id."""
@@ -54,7 +59,12 @@ async def get_user(
     return user
 
 
-@router.put("/{user_id}", response_model=UserRetriveScehema, status_code=status.HTTP_200_OK)
+@router.put(
+    "/{user_id}",
+    response_model=UserRetriveScehema,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(write_rate_limit)],
+)
 async def change_profile(
     user_id: int,
     user_data: UserUpdateSchema,
@@ -69,6 +79,7 @@ async def change_profile(
             user.last_name = user_data.last_name
             await db.commit()
             await db.refresh(user)
+            await principal_cache.invalidate(user_id)
             return user
         raise HTTPException(
             detail="Not profile owner",
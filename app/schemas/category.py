@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class CategoryCreateSchema(BaseModel):
@@ -6,6 +6,8 @@ class CategoryCreateSchema(BaseModel):
 
 
 class CategoryRetriveSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     is_active: bool
     name: str
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class PoolWaitTimeSchema(BaseModel):
+    count: int
+    sum: float
+    buckets: dict[str, int]
+
+
+class PoolStatusSchema(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    timeouts: int
+    wait_time: PoolWaitTimeSchema
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from app.schemas.user import UserRetriveScehema
 from app.schemas.category import CategoryRetriveSchema
@@ -14,6 +14,8 @@ class ProductCreateSchema(BaseModel):
 
 
 class ProductRetriveSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     name: str
     slug: str
@@ -21,6 +23,31 @@ class ProductRetriveSchema(BaseModel):
     price: int
     image_url: str | None
     stock: int
-    rating: int
+    rating: float
+    review_count: int
     category: CategoryRetriveSchema
     author: UserRetriveScehema | None
+
+
+class ProductPageSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    items: list[ProductRetriveSchema]
+    next_cursor: str | None
+
+
+class ProductBatchSchema(BaseModel):
+    items: list[ProductRetriveSchema]
+    # Запрошенные id, которых нет среди активных продуктов.
+    missing: list[int]
+
+
+class ProductImportErrorSchema(BaseModel):
+    line: int
+    error: str
+
+
+class ProductBulkImportResultSchema(BaseModel):
+    created: int
+    failed: int
+    errors: list[ProductImportErrorSchema]
@@ -1,11 +1,13 @@
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from app.schemas.user import UserRetriveScehema
 
 
 class ReviewRetriveSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     author: UserRetriveScehema
     product_id: int
@@ -22,3 +24,16 @@ class ReviewCreateSchema(BaseModel):
 
 class ReviewChangeStatusSchema(BaseModel):
     is_active: bool
+
+
+class ReviewPageSchema(BaseModel):
+    items: list[ReviewRetriveSchema]
+    next_cursor: str | None
+
+
+class ReviewSummarySchema(BaseModel):
+    product_id: int
+    review_count: int
+    rating: float
+    # Оценка (0-10) -> кол-во активных отзывов.
+    grades: dict[int, int]
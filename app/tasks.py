@@ -1,5 +1,18 @@
+import asyncio
 import time
+
+from redis import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.settings import DATABASE_URL, REDIS_URL
 from app.celery_config import celery
+from app.models.services.product_cache import product_version_key
+from app.models.services.products_utils import recompute_product_rating
+
+
+def rating_pending_key(product_id: int) -> str:
+    return f"tasks:rating:pending:{product_id}"
 
 
 @celery.task()
@@ -12,3 +25,30 @@ def call_background_task(message):
 @celery.task()
 def schedule_task():
     print("Hi, from schedule task!")
+
+
+async def _recompute_product_rating(product_id: int) -> None:
+    # Свой движок без пула на каждый вызов: asyncpg соединения привязаны к event loop,
+    # а задачи выполняются в отдельных `asyncio.run`. Пересчеты схлопываются, поэтому редки.
+    engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as session:
+            await recompute_product_rating(session, product_id)
+            await session.commit()
+    finally:
+        await engine.dispose()
+
+
+@celery.task(ignore_result=True)
+def recompute_product_rating_task(product_id: int) -> None:
+    """
+    Отложенный пересчет рейтинга продукта (`RATING_UPDATE_MODE=deferred`).
+
+    Отметка о запланированном пересчете снимается до чтения отзывов: изменения,
+    закоммиченные после этого, запланируют новый пересчет, а более ранние войдут в этот.
+    """
+    with Redis.from_url(REDIS_URL) as redis:
+        redis.delete(rating_pending_key(product_id))
+        asyncio.run(_recompute_product_rating(product_id))
+        # Сброс закешированной карточки продукта (см. `ProductDetailCache`).
+        redis.incr(product_version_key(product_id))
@@ -0,0 +1,262 @@
+"""
+Бенчмарк роутеров: приложение `app.main:app` поднимается в процессе (httpx ASGITransport)
+поверх отдельной базы, заполненной `benchmarks.seed`, и каждый сценарий прогоняется
+на нескольких размерах данных.
+
+Запуск (база и redis база должны быть отдельными, схема пересоздается, redis очищается!):
+    POSTGRES_DB=fastapi_bench python -m benchmarks.run --sizes 1000,10000
+    - По умолчанию redis база 15 (`REDIS_URL`), база 0 приложения не принимается.
+    - Сохранить результаты как baseline:
+        python -m benchmarks.run --save-baseline
+    - Сравнить с baseline (код выхода 1 при регрессии больше порога):
+        python -m benchmarks.run --threshold 0.2
+
+Отчет: p50/p95/p99 задержки (мс) и пропускная способность (rps) на сценарий и размер.
+"""
+
+import os
+
+# Настройки читаются при импорте приложения: access логи и лимиты запросов
+# в бенчмарке только мешают.
+os.environ.setdefault("LOG_ACCESS_SAMPLE_RATES", "INFO=0")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+# Кеши, версии и очередь celery бенчмарка - в своей redis базе (очищается при наполнении).
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:6379/15")
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+from app.settings import POSTGRES_DB
+from app.backend.db import engine
+from app.backend.redis import redis_client
+from app.main import app
+from benchmarks.seed import ADMIN_EMAIL, PASSWORD, seed_database
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+Scenario = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class BenchContext:
+    """Общее состояние сценариев одного размера данных."""
+
+    def __init__(self, size: int, token: str) -> None:
+        self.size = size
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.random = random.Random(size)
+        self.counter = itertools.count(1)
+        self.reviewed = itertools.count(1)
+
+    def product_id(self) -> int:
+        return self.random.randint(1, self.size)
+
+
+def build_scenarios(ctx: BenchContext) -> dict[str, Scenario]:
+    async def auth_token(client, _):
+        return await client.post(
+            "/auth/token", data={"username": ADMIN_EMAIL, "password": PASSWORD}
+        )
+
+    async def products_list(client, _):
+        return await client.get("/products/", headers=ctx.headers)
+
+    async def products_list_filtered(client, _):
+        return await client.get(
+            "/products/",
+            params={"min_price": 1000, "in_stock": True, "sort": "-rating"},
+            headers=ctx.headers,
+        )
+
+    async def product_detail(client, _):
+        return await client.get(f"/products/{ctx.product_id()}", headers=ctx.headers)
+
+    async def product_create(client, _):
+        number = next(ctx.counter)
+        return await client.post(
+            "/products/",
+            json={
+                "name": f"Bench created {ctx.size} {number} {time.time_ns()}",
+                "description": "Created by benchmark",
+                "price": 100,
+                "image_url": None,
+                "stock": 10,
+                "category_id": 1,
+            },
+            headers=ctx.headers,
+        )
+
+    async def reviews_list(client, _):
+        return await client.get(f"/products/{ctx.product_id()}/reviews", headers=ctx.headers)
+
+    async def review_create(client, index):
+        # Админ оставляет не больше одного отзыва на продукт -> идем по продуктам по порядку
+        # (при `--requests` больше размера данных часть запросов закончится 400).
+        product_id = next(ctx.reviewed) % ctx.size + 1
+        return await client.post(
+            f"/products/{product_id}/reviews",
+            json={"grade": index % 11, "comment": "Benchmark"},
+            headers=ctx.headers,
+        )
+
+    async def categories_list(client, _):
+        return await client.get("/category/", headers=ctx.headers)
+
+    async def admin_moderation(client, index):
+        review_id = ctx.random.randint(1, ctx.size)
+        return await client.put(
+            f"/admin/change_review_status/{review_id}",
+            json={"is_active": bool(index % 2)},
+            headers=ctx.headers,
+        )
+
+    return {
+        "auth_token": auth_token,
+        "products_list": products_list,
+        "products_list_filtered": products_list_filtered,
+        "product_detail": product_detail,
+        "product_create": product_create,
+        "reviews_list": reviews_list,
+        "review_create": review_create,
+        "categories_list": categories_list,
+        "admin_moderation": admin_moderation,
+    }
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+) -> dict[str, float]:
+    latencies: list[float] = []
+    errors = 0
+    indexes = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in indexes:
+            started = time.perf_counter()
+            response = await scenario(client, index)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(requests / elapsed, 1),
+        "errors": errors,
+    }
+
+
+async def run(sizes: list[int], requests: int, concurrency: int, only: set[str]) -> dict:
+    results: dict[str, dict[str, float]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in sizes:
+            print(f"Seeding {size} products...", file=sys.stderr)
+            await seed_database(engine, redis_client, size)
+            response = await client.post(
+                "/auth/token", data={"username": ADMIN_EMAIL, "password": PASSWORD}
+            )
+            response.raise_for_status()
+            ctx = BenchContext(size, response.json()["access_token"])
+            for name, scenario in build_scenarios(ctx).items():
+                if only and name not in only:
+                    continue
+                # Прогрев: кеши, пул соединений, prepared statements.
+                await run_scenario(client, scenario, min(requests, 10), 1)
+                result = await run_scenario(client, scenario, requests, concurrency)
+                results[f"{name}@{size}"] = result
+                print(
+                    f"{name:<24} size={size:<7} p50={result['p50_ms']:>9.2f}ms "
+                    f"p95={result['p95_ms']:>9.2f}ms p99={result['p99_ms']:>9.2f}ms "
+                    f"rps={result['rps']:>8.1f} errors={result['errors']}"
+                )
+    await engine.dispose()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Регрессии: p95 выросла или rps упала больше чем на `threshold` относительно baseline."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{key}: p95 {base['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{key}: rps {base['rps']} -> {result['rps']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--sizes", default="100,1000,10000", help="Кол-во продуктов через запятую")
+    parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", default="", help="Сценарии через запятую")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимая регрессия (доля)")
+    args = parser.parse_args()
+
+    if "bench" not in POSTGRES_DB:
+        print(
+            f"Refusing to reseed database {POSTGRES_DB!r}: "
+            "use a dedicated database with 'bench' in its name (POSTGRES_DB).",
+            file=sys.stderr,
+        )
+        return 2
+    if redis_client.connection_pool.connection_kwargs.get("db", 0) == 0:
+        print(
+            "Refusing to flush redis database 0: "
+            "use a dedicated redis database in REDIS_URL (e.g. redis://127.0.0.1:6379/15).",
+            file=sys.stderr,
+        )
+        return 2
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    only = {name for name in args.only.split(",") if name}
+    results = asyncio.run(run(sizes, args.requests, args.concurrency, only))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+    if not args.baseline.exists():
+        print("No baseline to compare with (use --save-baseline).", file=sys.stderr)
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Наполнение отдельной бенчмарк базы детерминированными данными заданного размера."""
+
+import random
+
+from redis.asyncio import Redis
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.backend.db import Base
+from app.models.category import Category
+from app.models.products import Product
+from app.models.review import Review
+from app.models.user import User
+from app.routers.services.auth import bcrypt_context
+
+
+ADMIN_EMAIL = "bench-admin@example.com"
+PASSWORD = "bench-password"
+CATEGORIES = 20
+REVIEWERS = 50
+REVIEWS_PER_PRODUCT = 3
+INSERT_CHUNK = 5000
+
+
+async def _insert_chunked(connection, model, rows: list[dict]) -> None:
+    for start in range(0, len(rows), INSERT_CHUNK):
+        await connection.execute(insert(model), rows[start:start + INSERT_CHUNK])
+
+
+async def seed_database(
+    engine: AsyncEngine,
+    redis: Redis,
+    products: int,
+    seed: int = 42,
+) -> None:
+    """
+    Пересоздание схемы и заполнение: админ + `REVIEWERS` пользователей,
+    `CATEGORIES` категорий, `products` продуктов и по `REVIEWS_PER_PRODUCT` отзывов на продукт.
+    Очищает отдельную бенчмарк базу redis: кеши и версии от прошлых данных не переживают
+    пересоздание.
+    """
+    rnd = random.Random(seed)
+    password_hash = bcrypt_context.hash(PASSWORD)
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+        users = [
+            {
+                "id": 1,
+                "email": ADMIN_EMAIL,
+                "password": password_hash,
+                "is_admin": True,
+                "is_supplier": True,
+                "is_customer": True,
+            }
+        ]
+        users += [
+            {
+                "id": index,
+                "email": f"bench-user-{index}@example.com",
+                "password": password_hash,
+                "is_admin": False,
+                "is_supplier": False,
+                "is_customer": True,
+            }
+            for index in range(2, REVIEWERS + 2)
+        ]
+        await _insert_chunked(connection, User, users)
+
+        await _insert_chunked(connection, Category, [
+            {
+                "id": index,
+                "name": f"Category {index}",
+                "slug": f"category-{index}",
+                "is_active": True,
+            }
+            for index in range(1, CATEGORIES + 1)
+        ])
+
+        product_rows, review_rows = [], []
+        for product_id in range(1, products + 1):
+            grades = [rnd.randint(0, 10) for _ in range(REVIEWS_PER_PRODUCT)]
+            product_rows.append({
+                "id": product_id,
+                "name": f"Product {product_id}",
+                "slug": f"product-{product_id}",
+                "description": f"Benchmark product {product_id} " * rnd.randint(1, 20),
+                "price": rnd.randint(1, 100_000),
+                "image_url": None,
+                "stock": rnd.randint(0, 100),
+                "rating": sum(grades) / len(grades),
+                "review_count": len(grades),
+                "grade_sum": sum(grades),
+                "is_active": True,
+                "category_id": rnd.randint(1, CATEGORIES),
+                "author_id": 1,
+            })
+            for offset, grade in enumerate(grades):
+                review_rows.append({
+                    "author_id": 2 + (product_id + offset) % REVIEWERS,
+                    "product_id": product_id,
+                    "grade": grade,
+                    "comment": "Benchmark review",
+                    "is_active": True,
+                })
+        await _insert_chunked(connection, Product, product_rows)
+        await _insert_chunked(connection, Review, review_rows)
+
+        # Явные id -> выставляем последовательности, чтобы новые записи не конфликтовали.
+        for table in ("users", "categories", "products", "reviews"):
+            await connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM {table}))"
+            ))
+        await connection.execute(text("ANALYZE"))
+
+    await redis.flushdb()
@@ -0,0 +1,95 @@
+"""
+Сериализация страницы продуктов: стандартный путь FastAPI (валидация по `response_model`
++ `jsonable_encoder` + `JSONResponse`) против `SchemaResponse` (прекомпилированный
+`TypeAdapter` + `dump_json`). База не нужна, продукты - transient ORM объекты.
+
+    python -m benchmarks.serialization --products 10000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models.category import Category
+from app.models.products import Product
+from app.models.review import Review  # noqa: F401  (регистрация маппера)
+from app.models.user import User
+from app.routers.services.serialization import SchemaResponse
+from app.schemas.product import ProductPageSchema
+
+
+def build_page(products: int) -> dict:
+    author = User(
+        id=1,
+        email="bench-admin@example.com",
+        first_name=None,
+        last_name=None,
+        is_admin=True,
+        is_supplier=True,
+        is_customer=True,
+    )
+    categories = [
+        Category(id=index, name=f"Category {index}", slug=f"category-{index}", is_active=True)
+        for index in range(1, 21)
+    ]
+    items = [
+        Product(
+            id=index,
+            name=f"Product {index}",
+            slug=f"product-{index}",
+            description=f"Benchmark product {index} " * 10,
+            price=index * 10,
+            image_url=None,
+            stock=index % 100,
+            rating=5.5,
+            review_count=3,
+            category=categories[index % len(categories)],
+            author=author,
+        )
+        for index in range(1, products + 1)
+    ]
+    return {"items": items, "next_cursor": None}
+
+
+async def fastapi_default(field, page: dict) -> bytes:
+    content = await serialize_response(field=field, response_content=page)
+    return bytes(JSONResponse(content).body)
+
+
+async def measure(name: str, func, repeat: int) -> None:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(await func())
+        timings.append(time.perf_counter() - started)
+    print(
+        f"{name:<16} median={statistics.median(timings) * 1000:>8.1f}ms "
+        f"min={min(timings) * 1000:>8.1f}ms size={size} bytes"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    page = build_page(args.products)
+    field = create_model_field(name="response", type_=ProductPageSchema, mode="serialization")
+    response = SchemaResponse(ProductPageSchema)
+
+    async def schema_response() -> bytes:
+        return response.dump(page)
+
+    await measure("fastapi_default", lambda: fastapi_default(field, page), args.repeat)
+    await measure("schema_response", schema_response, args.repeat)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())